@@ -7,10 +7,15 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
-import joblib
-import requests
-import io
-import time
+
+import model_utils
+from explain import ROTULOS, Explainer
+from fast_encoder import FastEncoder
+from forest_engine import load_forest
+from latency import LatencyTracker
+from prediction_cache import PredictionCache
+from similar_patients import ROTULOS_NIVEL, load_index, source_signature
+from what_if import what_if
 
 # ==========================================================================
 # Config página
@@ -38,29 +43,88 @@ def setup_options(lista):
 
 
 @st.cache_resource # Mantém o modelo na memória após o primeiro carregamento
-def load_model(): 
+def load_model(versao): 
     """
     Carrega o modelo treinado (.joblib) com fallback para GitHub.
+    A versão do artefato faz parte da chave do cache, recarregando o modelo quando ele muda.
+    """
+    return model_utils.load_model(versao)
+
+
+@st.cache_resource(ttl=model_utils.INTERVALO_VERSAO) # Confere o artefato no máximo uma vez por intervalo
+def get_model_version():
+    """
+    Hash da versão ativa do modelo. Evita consultar o repositório local (e a rede,
+    sem versão local) a cada interação com a página.
     """
-    local_path = 'models/modelo_final_random_forest.joblib'
-    github_url = "https://raw.githubusercontent.com/geoferreira1/fiap_tech_challenge_fase_4/main/models/modelo_final_random_forest.joblib"
+    return model_utils.artifact_version()
+
 
-    # 1. Tentativa Local
+@st.cache_resource # Compila a floresta em arrays uma única vez por versão do modelo
+def load_engine(_model, versao):
+    """
+    Converte o RandomForest do pipeline para a versão vetorizada em NumPy.
+    Retorna None se o classificador não puder ser compilado (fallback para o sklearn).
+    """
     try:
-        return joblib.load(local_path)
-    except (FileNotFoundError, Exception) as e:
-        print(f"Aviso: Modelo local não encontrado ou erro no carregamento: {e}")
+        return load_forest(_model, versao)
+    except Exception as e:
+        print(f"Aviso: Floresta compilada indisponível, usando o sklearn: {e}")
+        return None
 
-    # 2. Tentativa Remota (GitHub)
+
+@st.cache_resource # Encoder pré-compilado uma única vez por versão do modelo
+def load_encoder(_model, versao):
+    """
+    Extrai do pré-processamento as tabelas do one-hot e a média/escala das numéricas.
+    Retorna None se o pré-processamento não for suportado (fallback para o sklearn).
+    """
     try:
-        response = requests.get(github_url, timeout=15)
-        response.raise_for_status() # Levanta erro se o status não for 200
-        
-        return joblib.load(io.BytesIO(response.content))
+        return FastEncoder.from_pipeline(_model)
     except Exception as e:
-        print(f"Erro crítico: Não foi possível carregar o modelo remotamente: {e}")
-    
-    return None
+        print(f"Aviso: Encoder rápido indisponível, usando o sklearn: {e}")
+        return None
+
+
+@st.cache_resource # Explicador montado uma única vez por versão do modelo
+def load_explainer(_model, versao):
+    """
+    Combina a floresta compilada e o encoder rápido para explicar cada predição.
+    Retorna None se algum dos dois estiver indisponível.
+    """
+    engine, encoder = load_engine(_model, versao), load_encoder(_model, versao)
+    if engine is None or encoder is None:
+        return None
+    return Explainer(engine, encoder)
+
+
+@st.cache_resource # Índice de pacientes semelhantes por versão do modelo e da base
+def load_similarity_index(_model, versao, assinatura_base):
+    """
+    Abre o índice de vizinhos gravado ao lado do modelo, acrescentando as linhas novas
+    do df_base.csv. Retorna None se a base ou o encoder estiverem indisponíveis.
+    """
+    try:
+        return load_index(_model, versao)
+    except Exception as e:
+        print(f"Aviso: Índice de pacientes semelhantes indisponível: {e}")
+        return None
+
+
+@st.cache_resource # Um único rastreador compartilhado entre todas as sessões
+def get_latency_tracker():
+    """
+    Retorna o rastreador de latência das etapas reais da predição.
+    """
+    return LatencyTracker()
+
+
+@st.cache_resource # Cache de predições compartilhado entre todas as sessões
+def get_prediction_cache():
+    """
+    Retorna o cache LRU/TTL das predições por perfil de paciente.
+    """
+    return PredictionCache()
 
 def config_page(): # Configurar menu lateral
     """
@@ -96,11 +160,12 @@ def config_page(): # Configurar menu lateral
         """, unsafe_allow_html=True)
 
 
-def get_clinic_input(): # Coletar os dados do questionario
+@st.fragment # Alterações nestes campos reexecutam apenas esta seção, e não a página inteira
+def personal_section(): # Coletar os dados pessoais e calcular o IMC
     """
-    Coleta os dados do usuário no corpo principal da página e retorna um DataFrame
+    Coleta os dados pessoais e exibe o IMC do paciente.
+    Retorna a idade, o gênero normalizado (0/1) e o IMC.
     """
-    # DADOS PESSOAIS
     st.header("1. Informações Pessoais")
     st.markdown("Preencha os campos abaixo para o cálculo do **Índice de Massa Corpórea (IMC)**.")
     
@@ -108,10 +173,10 @@ def get_clinic_input(): # Coletar os dados do questionario
     
     with col1:
         idade = st.number_input("Idade", min_value=10, max_value=100, value=29)
-        peso = st.number_input("Peso (kg)", min_value=30.0, max_value=200.0, value=94.00)
+        peso = st.number_input("Peso (kg)", min_value=30.0, max_value=200.0, value=94.00, key="peso")
     
     with col2:
-        altura = st.number_input("Altura (m)", min_value=1.0, max_value=2.5, value=1.70)
+        altura = st.number_input("Altura (m)", min_value=1.0, max_value=2.5, value=1.70, key="altura")
         sexo = st.selectbox("Gênero", setup_options(["Masculino", "Feminino"]))
 
     # Normalização da informação de gênero
@@ -141,6 +206,17 @@ def get_clinic_input(): # Coletar os dados do questionario
     st.info(f"🎛️ **IMC do paciênte é de:** {imc} kg/m² ({base_imc})")
     st.markdown("---")
 
+    return idade, genero, imc
+
+
+def get_clinic_input(): # Coletar os dados do questionario
+    """
+    Coleta os dados do usuário no corpo principal da página e retorna o paciente
+    (dict com as 15 features) quando o formulário é enviado (None enquanto não houver envio).
+    """
+    # DADOS PESSOAIS
+    idade, genero, imc = personal_section()
+
     # HISTÓRICO E HÁBITOS
     st.header("2.  Estilo de vida e hábitos alimentares")
     st.markdown("Preencha os campos abaixo para que seja realizada a previsão.")
@@ -202,101 +278,110 @@ def get_clinic_input(): # Coletar os dados do questionario
         'Moto': 'moto'
     }
 
-    col_h1, col_h2 = st.columns(2)
-    
-    with col_h1:
-        
-        historico_familiar = st.pills(
-        "Possui histórico familiar de sobrepeso?",
-        options=option_map.keys(),
-        format_func=lambda option: option_map[option],
-        selection_mode="single",
-        default='Sim' 
-        )
-        
-        fuma = st.pills(
-        "Você é fumante ou ex-fumante?",
-        options=option_map.keys(),
-        format_func=lambda option: option_map[option],
-        selection_mode="single",
-        default='Sim' 
-        )
-        
-        consumo_alimentos_altamente_caloricos = st.pills(
-        "Consome alimentos calóricos frequentemente?",
-        options=option_map.keys(),
-        format_func=lambda option: option_map[option],
-        selection_mode="single",
-        default='Sim' 
-        )
-    
-        
-        monitoramento_calorias = st.pills(
-        "Costuma contabilizar as calorias ingeridas?",
-        options=option_map.keys(),
-        format_func=lambda option: option_map[option],
-        selection_mode="single",
-        default='Não' 
-        )
-        
-        refeicao_selecionada = st.pills(
-        "Quantas refeições principais faz por dia?",
-        options=list(mapa_refeicoes.keys()), 
-        selection_mode="single",
-        default='1'
-        )
-
-        vegetal_selecionada = st.pills(
-        "Costuma comer vegetais?",
-        options=list(mapa_vegetais.keys()), 
-        selection_mode="single",
-        default='Raramente'
-        )
-    
-    with col_h2:
-        
-        agua_selecionada = st.pills(
-        "Consumo diário de água?",
-        options=list(mapa_agua.keys()), 
-        selection_mode="single",
-        default='< 1 Litro'
-        )
-        
-        alimentacao_entre_refeicoes_selecionada = st.pills(
-        "Costuma comer entre as refeições?",
-        options=list(mapa_entre_refeicoes.keys()), 
-        selection_mode="single",
-        default='Nunca' 
-        )
-    
-        alcool_selecionada = st.pills(
-        "Costuma beber bebidas alcoólicas?",
-        options=list(mapa_alcool.keys()), 
-        selection_mode="single",
-        default='Nunca' 
-        )
-
-        atividade_fisica_selecionada = st.pills(
-        "Pratica atividade física?",
-        options=list(mapa_ativdade.keys()), 
-        selection_mode="single",
-        default='Sedentário'
-        )
-
-        tecnologia_selecionada = st.pills(
-        "Tempo diário em dispositivos eletrônicos?",
-        options=list(mapa_internet.keys()), 
-        selection_mode="single",
-        default='Baixa'
-        )
-
-        meio_de_transporte_selecionada = st.pills(
-        "Meio de transporte principal?",
-        options=list(mapa_transporte.keys()), 
-        selection_mode="single",
-        default='Transporte Público'
-        )
-    
+    # As respostas dos hábitos só são enviadas ao servidor no clique do botão (sem reexecuções a cada seleção)
+    with st.form("habitos", border=False):
+        col_h1, col_h2 = st.columns(2)
+
+        with col_h1:
+
+            historico_familiar = st.pills(
+            "Possui histórico familiar de sobrepeso?",
+            options=option_map.keys(),
+            format_func=lambda option: option_map[option],
+            selection_mode="single",
+            default='Sim' 
+            )
+
+            fuma = st.pills(
+            "Você é fumante ou ex-fumante?",
+            options=option_map.keys(),
+            format_func=lambda option: option_map[option],
+            selection_mode="single",
+            default='Sim' 
+            )
+
+            consumo_alimentos_altamente_caloricos = st.pills(
+            "Consome alimentos calóricos frequentemente?",
+            options=option_map.keys(),
+            format_func=lambda option: option_map[option],
+            selection_mode="single",
+            default='Sim' 
+            )
+
+
+            monitoramento_calorias = st.pills(
+            "Costuma contabilizar as calorias ingeridas?",
+            options=option_map.keys(),
+            format_func=lambda option: option_map[option],
+            selection_mode="single",
+            default='Não' 
+            )
+
+            refeicao_selecionada = st.pills(
+            "Quantas refeições principais faz por dia?",
+            options=list(mapa_refeicoes.keys()), 
+            selection_mode="single",
+            default='1'
+            )
+
+            vegetal_selecionada = st.pills(
+            "Costuma comer vegetais?",
+            options=list(mapa_vegetais.keys()), 
+            selection_mode="single",
+            default='Raramente'
+            )
+
+        with col_h2:
+
+            agua_selecionada = st.pills(
+            "Consumo diário de água?",
+            options=list(mapa_agua.keys()), 
+            selection_mode="single",
+            default='< 1 Litro'
+            )
+
+            alimentacao_entre_refeicoes_selecionada = st.pills(
+            "Costuma comer entre as refeições?",
+            options=list(mapa_entre_refeicoes.keys()), 
+            selection_mode="single",
+            default='Nunca' 
+            )
+
+            alcool_selecionada = st.pills(
+            "Costuma beber bebidas alcoólicas?",
+            options=list(mapa_alcool.keys()), 
+            selection_mode="single",
+            default='Nunca' 
+            )
+
+            atividade_fisica_selecionada = st.pills(
+            "Pratica atividade física?",
+            options=list(mapa_ativdade.keys()), 
+            selection_mode="single",
+            default='Sedentário'
+            )
+
+            tecnologia_selecionada = st.pills(
+            "Tempo diário em dispositivos eletrônicos?",
+            options=list(mapa_internet.keys()), 
+            selection_mode="single",
+            default='Baixa'
+            )
+
+            meio_de_transporte_selecionada = st.pills(
+            "Meio de transporte principal?",
+            options=list(mapa_transporte.keys()), 
+            selection_mode="single",
+            default='Transporte Público'
+            )
+
+        st.markdown("---")
+        st.markdown("###")
+        enviado = st.form_submit_button("🎯 Clique aqui para saber a previsão", type="primary", width="stretch")
+
+    if not enviado:
+        return None
+
     # Normalização das respostas
     historico_familiar = 1 if historico_familiar == "Sim" else 0
     fuma = 1 if fuma == "Sim" else 0
@@ -311,9 +396,6 @@ def get_clinic_input(): # Coletar os dados do questionario
     tempo_uso_tecnologia = mapa_internet[tecnologia_selecionada]
     meio_de_transporte = mapa_transporte[meio_de_transporte_selecionada]
 
-    
-    st.markdown("---")
-
     data = {
         'idade': idade,
         'genero': genero,
@@ -331,16 +413,117 @@ def get_clinic_input(): # Coletar os dados do questionario
         'meio_de_transporte': meio_de_transporte,
         'imc': imc
     }
-    
-    return pd.DataFrame(data, index=[0])
+
+    return data
+
+
+def explanation_section(model, paciente, versao_modelo, n_campos=8): # Fatores da predição
+    """
+    Exibe a contribuição dos campos que mais influenciaram a probabilidade deste paciente.
+    """
+    explainer = load_explainer(model, versao_modelo)
+    if explainer is None:
+        return
+
+    with get_latency_tracker().stage('explicacao'):
+        base, contribuicoes = explainer.explain(paciente)
+
+    principais = contribuicoes.head(n_campos) * 100
+    grafico = pd.DataFrame({
+        'Campo': [ROTULOS[col] for col in principais.index],
+        'Aumenta o risco': principais.clip(lower=0).to_numpy(),
+        'Reduz o risco': principais.clip(upper=0).to_numpy()
+    })
+
+    st.subheader("🧩 O que mais influenciou esta previsão?")
+    st.bar_chart(
+        grafico, x='Campo', y=['Aumenta o risco', 'Reduz o risco'], x_label="Contribuição (p.p.)", y_label="",
+        color=["#A0522D", "#D2B48C"], horizontal=True, sort=False
+    )
+    st.caption(f"Partindo do risco médio da base de treino ({base * 100:.1f}%), cada campo soma ou subtrai pontos percentuais até a probabilidade do paciente.")
+
+
+def similar_section(model, paciente, versao_modelo, k=5): # Pacientes semelhantes da base
+    """
+    Exibe os k pacientes históricos mais próximos no espaço de variáveis do modelo
+    e o nível de obesidade observado em cada um.
+    """
+    try:
+        assinatura = source_signature()
+    except OSError:
+        return
+    indice = load_similarity_index(model, versao_modelo, assinatura)
+    if indice is None:
+        return
+
+    with get_latency_tracker().stage('similares'):
+        similares = indice.query(paciente, k)
+    if similares.empty: # Base histórica vazia
+        return
+
+    tabela = pd.DataFrame({
+        'Idade': similares['idade'],
+        'Gênero': similares['genero'].map({0: 'Masculino', 1: 'Feminino'}),
+        'IMC': similares['imc'],
+        'Nível de obesidade observado': similares['nivel_de_obesidade'].map(ROTULOS_NIVEL).fillna(similares['nivel_de_obesidade']),
+        'Distância': similares['distancia']
+    })
+    obesos = similares['nivel_de_obesidade'].str.contains('obesidade').sum()
+
+    st.subheader("👥 Pacientes semelhantes")
+    st.markdown(f"Os **{len(tabela)}** pacientes da base com respostas mais parecidas; **{obesos}** deles apresentam obesidade.")
+    st.dataframe(tabela, width="stretch", hide_index=True, column_config={"Distância": st.column_config.NumberColumn(format="%.2f")})
+    st.caption("A distância é medida nas mesmas variáveis codificadas usadas pelo modelo (o IMC não entra no cálculo).")
+
+
+def what_if_section(model, paciente, versao_modelo): # Simulação de mudanças de hábitos
+    """
+    Exibe o quanto o risco muda ao alterar um único hábito (ou o peso) do paciente.
+    Todas as alternativas são pontuadas de uma vez, em uma única chamada ao modelo.
+    """
+    tabela = what_if(
+        model, paciente, st.session_state.get("peso"), st.session_state.get("altura"),
+        engine=load_engine(model, versao_modelo), encoder=load_encoder(model, versao_modelo)
+    )
+
+    st.subheader("🔍 E se o paciente mudar um hábito?")
+    st.markdown("Variação da probabilidade de risco ao alterar **um único** hábito, mantendo as demais respostas.")
+    st.dataframe(
+        tabela, width="stretch", hide_index=True,
+        column_config={
+            "Risco (%)": st.column_config.NumberColumn(format="%.1f%%"),
+            "Variação (p.p.)": st.column_config.NumberColumn(format="%+.1f")
+        }
+    )
+
+
+def debug_panel(): # Painel de latência para operadores
+    """
+    Exibe os percentis de latência por etapa (ativado com ?debug=1 na URL).
+    """
+    if st.query_params.get("debug") != "1":
+        return
+
+    tracker = get_latency_tracker()
+    with st.expander("⏱️ Latência por etapa (ms)", expanded=True):
+        st.caption(f"Cache de predições: {get_prediction_cache().stats()}")
+        resumo = tracker.summary()
+        if not resumo:
+            st.info("Nenhuma predição registrada até o momento.")
+            return
+        st.dataframe(pd.DataFrame.from_dict(resumo, orient="index"), width="stretch")
+        st.download_button("📥 Exportar métricas (JSON)", tracker.dump(), file_name="latencias.json", mime="application/json")
 
 
 def main(): # Função princial
     # 1. Configura a Barra Lateral
     config_page()
 
-    # 2. Carrega o Modelo
-    model = load_model()
+    # 2. Carrega o Modelo (e invalida o cache de predições se o artefato mudou)
+    versao_modelo = get_model_version()
+    model = load_model(versao_modelo)
+    cache = get_prediction_cache()
+    cache.ensure_version(versao_modelo)
 
     # 3. Página do cálculo predição
     st.caption("🏥 MedAnalytics | Gestão de Saúde <sup>1</sup>", unsafe_allow_html=True)
@@ -350,47 +533,59 @@ def main(): # Função princial
     """)
     st.markdown("---")
 
-    # 4. Formulário
-    input_df = get_clinic_input()
+    # 4. Formulário (as respostas só são lidas no envio)
+    paciente = get_clinic_input()
 
-    # 5. Botão e Predição
-    st.markdown("###")
-    
-    if st.button("🎯 Clique aqui para saber a previsão", type="primary", use_container_width=True):
+    # 5. Predição
+    if paciente is not None:
         if model is not None:
             try:
-                    # --- INÍCIO DA BARRA DE PROGRESSO ---
-                progress_text = "Analisando dados do paciente. Por favor, aguarde..."
-                my_bar = st.progress(0, text=progress_text)
-
-                for percent_complete in range(100):
-                    time.sleep(0.01)  # Simula o tempo de processamento
-                    my_bar.progress(percent_complete + 1, text=progress_text)
-
-                time.sleep(0.5) # Pequena pausa para o usuário ver os 100%
-                my_bar.empty()  # Limpa a barra após concluir
-                # --- FIM DA BARRA DE PROGRESSO ---
-
-                prediction = model.predict(input_df)
-                probability = model.predict_proba(input_df)
+                # Perfis já avaliados são respondidos pelo cache, sem pré-processamento nem floresta
+                chave = PredictionCache.make_key(paciente, versao_modelo)
+                resultado = cache.get(chave)
+
+                if resultado is None:
+                    # Classe e probabilidade saem da mesma passagem pelo modelo (etapas cronometradas);
+                    # o dict do paciente é codificado direto, sem DataFrame
+                    with st.spinner("Analisando dados do paciente. Por favor, aguarde..."):
+                        resultado = model_utils.predict_risk(
+                            model, paciente, tracker=get_latency_tracker(), engine=load_engine(model, versao_modelo),
+                            encoder=load_encoder(model, versao_modelo)
+                        )
+                    cache.put(chave, resultado)
+
+                prediction, probability, limiar = resultado
 
                 st.markdown("---")
                 st.header("Resultado da Análise")
 
                 if prediction[0] == 1:
                     st.error("🚨 **ALTO RISCO DE OBESIDADE**")
-                    st.metric(label="A probabilidade do paciente se tornar obeso futuramente é de:", value=f"{probability[0][1] * 100:.1f}%")
+                    st.metric(label="A probabilidade do paciente se tornar obeso futuramente é de:", value=f"{probability[0] * 100:.1f}%")
                     st.warning("💭 **Recomendação:** Sugere-se encaminhamento para orientação médica e nutricional além de realizar ajustes no estilo de vida.")
                 else:
                     st.success("🥳 **BAIXO RISCO DE OBESIDADE**")
-                    st.metric(label="Probabilidade de Risco", value=f"{probability[0][1] * 100:.1f}%")
+                    st.metric(label="Probabilidade de Risco", value=f"{probability[0] * 100:.1f}%")
                     st.info("💭 **Recomendação:** Continar mantendo hábitos saudáveis e realizar acompanhamento médico periódico.")
+
+                st.caption(f"Limiar de decisão aplicado: {limiar * 100:.0f}%")
+
+                st.markdown("---")
+                explanation_section(model, paciente, versao_modelo)
+
+                st.markdown("---")
+                similar_section(model, paciente, versao_modelo)
+
+                st.markdown("---")
+                what_if_section(model, paciente, versao_modelo)
             
             except Exception as e:
                 st.error(f"Ocorreu um erro técnico ao realizar a predição: {e}")
         else:
             st.error("📣 O modelo de predição retornou um erro, por gentileza verifique se os dados foram selecionados corretamente.")
 
+    debug_panel()
+
     st.markdown("---")
 
     # Adiciona o crédito final da aplicação centralizado no rodapé
@@ -0,0 +1,152 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import argparse
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from model_utils import FEATURES, load_model, predict_risk, validate_features
+
+# ==========================================================================
+# Constantes
+# ==========================================================================
+CHUNKSIZE_PADRAO = 50_000 # Quantidade máxima de pacientes processados por vez
+
+# ==========================================================================
+# Funções
+# ==========================================================================
+
+def iter_chunks(caminho, chunksize=CHUNKSIZE_PADRAO):
+    """
+    Lê o arquivo de entrada (CSV ou Parquet) em blocos de tamanho limitado,
+    evitando carregar a base inteira na memória.
+    """
+    caminho = Path(caminho)
+
+    if caminho.suffix.lower() == '.parquet':
+        arquivo = pq.ParquetFile(caminho)
+        for batch in arquivo.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        # Colunas extras são lidas como texto, para que o tipo não varie entre os blocos
+        extras = {col: str for col in _colunas_csv(caminho) if col not in FEATURES}
+        yield from pd.read_csv(caminho, chunksize=chunksize, dtype=extras, encoding='utf-8-sig')
+
+
+def _colunas_csv(caminho):
+    return pd.read_csv(caminho, nrows=0, encoding='utf-8-sig').columns
+
+
+def input_schema(caminho):
+    """
+    Esquema Arrow das colunas extras (repassadas sem uso pelo modelo) do arquivo de entrada:
+    o do próprio Parquet ou texto para o CSV. Evita que a saída Parquet herde o tipo inferido
+    no primeiro bloco (ex: coluna vazia no início e preenchida depois).
+    """
+    caminho = Path(caminho)
+    if caminho.suffix.lower() == '.parquet':
+        esquema = pq.ParquetFile(caminho).schema_arrow
+        return pa.schema([campo for campo in esquema if campo.name not in FEATURES])
+    return pa.schema([(col, pa.string()) for col in _colunas_csv(caminho) if col not in FEATURES])
+
+
+def score_chunk(model, chunk):
+    """
+    Pontua um bloco de pacientes com uma única chamada de predict_proba
+    e retorna o bloco acrescido da classe e da probabilidade de risco.
+    """
+    validate_features(chunk)
+
+    predicao = predict_risk(model, chunk[FEATURES])
+
+    resultado = chunk.copy()
+    resultado['classe_risco'] = predicao.classe
+    resultado['probabilidade_risco'] = predicao.probabilidade
+    return resultado
+
+
+class _ResultWriter:
+    """
+    Escreve os blocos pontuados de forma incremental no arquivo de saída.
+    """
+    def __init__(self, caminho, esquema_entrada=None):
+        self.caminho = Path(caminho)
+        self.esquema_entrada = esquema_entrada
+        self.parquet = self.caminho.suffix.lower() == '.parquet'
+        self._writer = None
+        self._primeiro_bloco = True
+
+    def write(self, df):
+        if self.parquet:
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.caminho, self._esquema(df))
+            # Mantém o mesmo esquema em todo o arquivo
+            tabela = pa.Table.from_pandas(df, schema=self._writer.schema, preserve_index=False)
+            self._writer.write_table(tabela)
+        else:
+            df.to_csv(self.caminho, mode='w' if self._primeiro_bloco else 'a',
+                      header=self._primeiro_bloco, index=False, encoding='utf-8')
+        self._primeiro_bloco = False
+
+    def _esquema(self, df):
+        """
+        Esquema inferido do primeiro bloco, com as colunas extras no tipo do arquivo de entrada.
+        """
+        esquema = pa.Table.from_pandas(df, preserve_index=False).schema
+        for campo in self.esquema_entrada or []:
+            esquema = esquema.set(esquema.get_field_index(campo.name), campo)
+        return esquema
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def score_file(entrada, saida, model=None, chunksize=CHUNKSIZE_PADRAO):
+    """
+    Pontua todos os pacientes do arquivo de entrada bloco a bloco e grava
+    classe e probabilidade de risco no arquivo de saída (CSV ou Parquet).
+    Retorna a quantidade de pacientes pontuados.
+    """
+    if model is None:
+        model = load_model()
+    if model is None:
+        raise RuntimeError("Não foi possível carregar o modelo de predição.")
+
+    Path(saida).parent.mkdir(parents=True, exist_ok=True)
+    writer = _ResultWriter(saida, input_schema(entrada))
+    total = 0
+
+    try:
+        for chunk in iter_chunks(entrada, chunksize):
+            writer.write(score_chunk(model, chunk))
+            total += len(chunk)
+    finally:
+        writer.close()
+
+    return total
+
+
+def main(): # Função principal
+    parser = argparse.ArgumentParser(description="Pontuação em lote do risco de obesidade (CSV/Parquet).")
+    parser.add_argument('entrada', help="Arquivo de pacientes (.csv ou .parquet) com as 15 colunas do modelo.")
+    parser.add_argument('saida', help="Arquivo de saída (.csv ou .parquet).")
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE_PADRAO, help="Pacientes processados por bloco.")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    total = score_file(args.entrada, args.saida, chunksize=args.chunksize)
+    duracao = time.perf_counter() - inicio
+
+    print("-" * 30)
+    print(f"✅ {total} pacientes pontuados em {duracao:.1f}s")
+    print(f"📄 Arquivo: {args.saida}")
+    print("-" * 30)
+
+
+if __name__ == "__main__":
+    main()
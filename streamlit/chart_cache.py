@@ -0,0 +1,102 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+
+import matplotlib.pyplot as plt
+
+# ==========================================================================
+# Constantes
+# ==========================================================================
+TAMANHO_MAXIMO_PADRAO = 64 * 1024 * 1024 # Limite total das imagens guardadas (64 MB)
+# Mesmas opções usadas pelo st.pyplot, para que a imagem em cache seja idêntica à renderizada
+OPCOES_PNG = {'bbox_inches': 'tight', 'dpi': 200, 'format': 'png'}
+
+# ==========================================================================
+# Funções
+# ==========================================================================
+
+def render_png(fig):
+    """
+    Rasteriza a figura do Matplotlib em PNG e a fecha, liberando a memória.
+    """
+    imagem = io.BytesIO()
+    fig.savefig(imagem, **OPCOES_PNG)
+    plt.close(fig)
+    return imagem.getvalue()
+
+# ==========================================================================
+# Classes
+# ==========================================================================
+
+class ChartCache:
+    """
+    Cache LRU das imagens já renderizadas dos gráficos, limitado pelo total de
+    bytes e compartilhado entre sessões. A chave combina o gráfico, o estado dos
+    filtros e a versão da base, então o desenho só é refeito quando algo muda.
+    """
+    def __init__(self, max_bytes=TAMANHO_MAXIMO_PADRAO):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(grafico, filtros, versao):
+        """
+        Gera a chave canônica: hash do JSON ordenado de (gráfico, filtros, versão da base).
+        """
+        conteudo = json.dumps([grafico, filtros, versao], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+    def get(self, chave):
+        with self._lock:
+            imagem = self._itens.get(chave)
+            if imagem is None:
+                self.misses += 1
+                return None
+
+            self._itens.move_to_end(chave)
+            self.hits += 1
+            return imagem
+
+    def put(self, chave, imagem):
+        if len(imagem) > self.max_bytes: # Imagem maior que o próprio cache: não é guardada
+            return
+
+        with self._lock:
+            anterior = self._itens.pop(chave, None)
+            if anterior is not None:
+                self.bytes -= len(anterior)
+            self._itens[chave] = imagem
+            self.bytes += len(imagem)
+            while self.bytes > self.max_bytes:
+                _, removida = self._itens.popitem(last=False) # Remove a imagem usada há mais tempo
+                self.bytes -= len(removida)
+
+    def get_or_render(self, chave, desenhar):
+        """
+        Retorna o PNG em cache ou executa desenhar() (que devolve a figura), rasteriza e guarda.
+        """
+        imagem = self.get(chave)
+        if imagem is None:
+            imagem = render_png(desenhar())
+            self.put(chave, imagem)
+        return imagem
+
+    def stats(self):
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'taxa_acerto': round(self.hits / consultas, 3) if consultas else 0.0,
+                'imagens': len(self._itens),
+                'bytes': self.bytes
+            }
@@ -0,0 +1,188 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from etl import load_manifest, read_partitions
+from model_store import sha256_file
+
+# ==========================================================================
+# Constantes
+# ==========================================================================
+DATA_PATH = 'data_processed/df_base.csv'
+DATA_URL = "https://raw.githubusercontent.com/geoferreira1/fiap_tech_challenge_fase_4/main/data_processed/df_base.csv"
+SNAPSHOT_PATH = 'data_processed/df_dashboard.parquet'
+
+# Elabora um dicionário para traduzir os termos originais para nomes amigáveis em português
+TRADUCAO_GERAL = {
+    'baixa': 'Baixo', 'moderada': 'Moderado', 'alta': 'Alto', 'sempre': 'Sempre',
+    'as_vezes': 'Às vezes', 'raramente': 'Raramente', 'nunca': 'Nunca',
+    'sedentario': 'Sedentário', 'transporte_publico': 'Transporte Público',
+    'caminhada': 'Caminhada', 'carro': 'Automóvel', 'moto': 'Motocicleta', 'bicicleta': 'Bicicleta',
+    'tres_refeicoes_por_dia': '3 refeições', 'uma_refeicao_por_dia': '1 refeição',
+    'duas_refeicoes_por_dia': '2 refeições', 'maior_que_tres_refeicoes_por_dia': 'Mais de 3'
+}
+
+# Relaciona as colunas do df que precisam passar pela tradução
+COLS_PARA_TRADUZIR = [
+    'consumo_refeicoes_principais', 'consumo_vegetais', 'consumo_agua',
+    'frequencia_atividade_fisica', 'tempo_uso_tecnologia',
+    'consumo_lanches_entre_refeicoes', 'consumo_alcool', 'meio_de_transporte'
+]
+
+# Cria o mapeamento para categorizar clinicamente os níveis de obesidade
+MAPA_OBESIDADE = {
+    'insuficiencia_ponderal': 'Abaixo do Peso', 'dentro_do_peso': 'Peso Normal',
+    'sobrepeso_um': 'Sobrepeso I', 'sobrepeso_dois': 'Sobrepeso II',
+    'obesidade_um': 'Obesidade I', 'obesidade_dois': 'Obesidade II', 'obesidade_tres': 'Obesidade III'
+}
+
+# Rótulos pré-calculados das colunas binárias e das faixas etárias usadas nos gráficos
+ROTULOS_BINARIOS = {
+    'genero_label': ('genero', {0: 'Masculino', 1: 'Feminino'}),
+    'hist_label': ('historico_familiar', {1: 'Possui', 0: 'Não possui'}),
+    'fuma_label': ('fuma', {1: 'Fumante', 0: 'Não Fumante'}),
+    'monit_label': ('monitoramento_calorias', {1: 'Monitora', 0: 'Não Monitora'})
+}
+FAIXAS_ETARIAS = {'bins': [0, 25, 40, 60, 100], 'labels': ['Até 25', '26-40', '41-60', '60+']}
+COLS_BINARIAS = ['genero', 'fuma', 'consumo_alimentos_altamente_caloricos', 'monitoramento_calorias', 'historico_familiar']
+COLS_CATEGORICAS = COLS_PARA_TRADUZIR + ['nivel_de_obesidade', 'categoria'] + list(ROTULOS_BINARIOS)
+
+# Colunas disponíveis nos filtros da barra lateral (além da faixa etária)
+COLS_FILTRO = ['genero_label', 'fuma', 'historico_familiar', 'consumo_alimentos_altamente_caloricos',
+               'monitoramento_calorias'] + COLS_PARA_TRADUZIR
+
+# ==========================================================================
+# Funções
+# ==========================================================================
+
+def preparar_base(df):
+    """
+    Aplica ao df_base as traduções e colunas derivadas usadas pelo dashboard,
+    de forma vetorizada, e converte os textos em colunas categóricas.
+    """
+    df = df.copy()
+
+    # Processa a coluna idade: converte para número e se o valor for impossível (>120), isola os dois primeiros dígitos
+    df['idade'] = pd.to_numeric(df['idade'].where(df['idade'] <= 120, df['idade'].astype(str).str[:2]), errors='coerce')
+
+    # Substitui os termos conforme o dicionário de tradução, mantendo os que não possuem tradução
+    for col in COLS_PARA_TRADUZIR:
+        df[col] = df[col].map(TRADUCAO_GERAL).fillna(df[col])
+
+    # Gera a nova coluna 'categoria' baseada na tradução dos níveis de obesidade
+    df['categoria'] = df['nivel_de_obesidade'].map(MAPA_OBESIDADE)
+    # Cria uma flag booleana que detecta se o texto da categoria contém a palavra "obesidade"
+    df['is_obese'] = df['nivel_de_obesidade'].str.contains('obesidade', case=False, na=False)
+
+    # Rótulos textuais das colunas binárias e faixa etária (antes calculados a cada interação)
+    for rotulo, (col, mapa) in ROTULOS_BINARIOS.items():
+        df[rotulo] = df[col].map(mapa)
+    df['faixa_etaria'] = pd.cut(df['idade'], **FAIXAS_ETARIAS)
+
+    # Tipagem compacta: textos como categóricos e indicadores binários em 8 bits
+    for col in COLS_CATEGORICAS:
+        df[col] = df[col].astype('category')
+    df[COLS_BINARIAS] = df[COLS_BINARIAS].astype('int8')
+
+    return df
+
+
+def _gravar_snapshot(df, destino, versao, lotes):
+    """
+    Grava o snapshot com a versão da base e as impressões digitais dos lotes do ETL nos metadados.
+    O arquivo é substituído de uma só vez, sem que o Dashboard leia um snapshot pela metade.
+    """
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    metadados = {**tabela.schema.metadata, b'versao_base': str(versao).encode(), b'lotes': json.dumps(lotes).encode()}
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporario = destino.with_name(f".tmp-{os.getpid()}-{destino.name}")
+    pq.write_table(tabela.replace_schema_metadata(metadados), temporario)
+    os.replace(temporario, destino)
+
+
+def snapshot_metadata(caminho=SNAPSHOT_PATH):
+    """
+    Versão da base e lotes do ETL registrados no snapshot (dicionário vazio se não houver).
+    """
+    metadados = pq.read_schema(caminho).metadata or {}
+    if b'versao_base' not in metadados:
+        return {}
+    return {'versao_base': metadados[b'versao_base'].decode(), 'lotes': json.loads(metadados[b'lotes'])}
+
+
+def build_snapshot(origem=DATA_PATH, destino=SNAPSHOT_PATH):
+    """
+    Gera o snapshot colunar (Parquet) já traduzido e tipado a partir do df_base.csv
+    ou da saída particionada do ETL. No segundo caso, se o snapshot já contém os lotes
+    anteriores, apenas as partições novas são preparadas e acrescentadas.
+    Retorna o DataFrame e a lista de partições processadas.
+    """
+    if not Path(origem).is_dir():
+        df = preparar_base(pd.read_csv(origem, encoding='utf-8-sig'))
+        _gravar_snapshot(df, destino, sha256_file(origem)[:16], [])
+        return df, [str(origem)]
+
+    manifesto = load_manifest(origem)
+    lotes = [p['hash_bruto'] for p in manifesto['particoes']]
+    anteriores = snapshot_metadata(destino).get('lotes') if Path(destino).exists() else None
+
+    if anteriores is not None and lotes[:len(anteriores)] == anteriores:
+        # Os lotes do snapshot continuam na base: processa somente as partições seguintes
+        novas = [p['arquivo'] for p in manifesto['particoes'][len(anteriores):]]
+        df = pd.concat([load_snapshot(destino), preparar_base(read_partitions(origem, novas))], ignore_index=True)
+        for col in COLS_CATEGORICAS: # Categorias diferentes entre as partes viram texto na concatenação
+            df[col] = df[col].astype('category')
+    else:
+        novas = [p['arquivo'] for p in manifesto['particoes']]
+        df = preparar_base(read_partitions(origem, novas))
+
+    _gravar_snapshot(df, destino, manifesto['versao'], lotes)
+    return df, novas
+
+
+def load_snapshot(caminho=SNAPSHOT_PATH):
+    """
+    Abre o snapshot pronto para o dashboard, preservando os tipos categóricos.
+    """
+    return pd.read_parquet(caminho)
+
+
+def dataset_version(caminho=SNAPSHOT_PATH):
+    """
+    Versão da base do dashboard: a registrada pelo ETL no snapshot ou, em snapshots
+    antigos, o hash do conteúdo (None se o snapshot não existir).
+    """
+    try:
+        return snapshot_metadata(caminho).get('versao_base') or sha256_file(caminho)[:16]
+    except FileNotFoundError:
+        return None
+
+
+def main(): # Função principal
+    parser = argparse.ArgumentParser(description="Gera o snapshot colunar usado pelo Dashboard.")
+    parser.add_argument('--origem', default=DATA_PATH, help="df_base.csv ou pasta particionada gerados pelo ETL.")
+    parser.add_argument('--destino', default=SNAPSHOT_PATH, help="Arquivo Parquet de saída.")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    df, processadas = build_snapshot(args.origem, args.destino)
+
+    print("-" * 30)
+    print(f"✅ Snapshot gerado com {len(df)} pacientes em {time.perf_counter() - inicio:.2f}s")
+    print(f"🧩 Origens processadas: {processadas} | versão: {dataset_version(args.destino)}")
+    print(f"📄 Arquivo: {args.destino}")
+    print("-" * 30)
+
+
+if __name__ == "__main__":
+    main()
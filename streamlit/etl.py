@@ -0,0 +1,522 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import time
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import psutil
+
+# ==========================================================================
+# Constantes
+# ==========================================================================
+RAW_PATH = 'data_raw/Obesity.csv'
+DATA_PATH = 'data_processed/df_base.csv'
+PARTS_PATH = 'data_processed/df_base' # Saída particionada do processamento em lotes
+LOTE_PADRAO = 100_000 # Registros da base original processados por lote
+MANIFEST_NAME = '_manifest.json'
+
+# Dicionário de mapeamento das colunas da base original
+mapeamento_colunas = {
+    'Gender': 'genero',
+    'Age': 'idade',
+    'Height': 'altura',
+    'Weight': 'peso',
+    'family_history': 'historico_familiar',
+    'FAVC': 'consumo_alimentos_altamente_caloricos',
+    'FCVC': 'consumo_vegetais',
+    'NCP': 'consumo_refeicoes_principais',
+    'CAEC': 'consumo_lanches_entre_refeicoes',
+    'SMOKE': 'fuma',
+    'CH2O': 'consumo_agua',
+    'SCC': 'monitoramento_calorias',
+    'FAF': 'frequencia_atividade_fisica',
+    'TUE': 'tempo_uso_tecnologia',
+    'CALC': 'consumo_alcool',
+    'MTRANS': 'meio_de_transporte',
+    'Obesity': 'nivel_de_obesidade'
+}
+
+# Dicionários de mapeamento dos valores
+mapa_binario_sim_nao = {'yes': 1, 'no': 0}
+mapa_genero = {'Female': 1, 'Male': 0}
+mapa_frequencia_texto = {'no': 'nunca', 'Sometimes': 'baixa', 'Frequently': 'moderada', 'Always': 'alta'}
+
+mapa_vegetais = {1: 'raramente', 2: 'as_vezes', 3: 'sempre'}
+mapa_refeicoes = {1: 'uma_refeicao_por_dia', 2: 'duas_refeicoes_por_dia', 3: 'tres_refeicoes_por_dia', 4: 'maior_que_tres_refeicoes_por_dia'}
+mapa_internet = {0: 'baixa', 1: 'moderada', 2: 'alta'}
+mapa_agua = {1: 'baixa', 2: 'moderada', 3: 'alta'}
+mapa_atividade = {0: 'sedentario', 1: 'baixa', 2: 'moderada', 3: 'alta'}
+mapa_transporte = {'Automobile': 'carro', 'Public_Transportation': 'transporte_publico', 'Walking': 'caminhada', 'Bike': 'bicicleta', 'Motorbike': 'moto'}
+mapa_obesidade = {'Insufficient_Weight': 'abaixo_do_peso', 'Normal_Weight': 'dentro_do_peso', 'Overweight_Level_I': 'sobrepeso_um', 'Overweight_Level_II': 'sobrepeso_dois', 'Obesity_Type_I': 'obesidade_um', 'Obesity_Type_II': 'obesidade_dois', 'Obesity_Type_III': 'obesidade_tres'}
+
+colunas_binarias_sim_nao = ['fuma', 'monitoramento_calorias', 'historico_familiar', 'consumo_alimentos_altamente_caloricos']
+
+# Colunas numéricas convertidas em faixas categóricas: (mapa, mínimo, máximo)
+colunas_numericas_categoricas = {
+    'consumo_vegetais': (mapa_vegetais, 1, 3),
+    'consumo_refeicoes_principais': (mapa_refeicoes, 1, 4),
+    'tempo_uso_tecnologia': (mapa_internet, 0, 2),
+    'consumo_agua': (mapa_agua, 1, 3),
+    'frequencia_atividade_fisica': (mapa_atividade, 0, 3)
+}
+
+colunas_ordenadas = [
+    "idade","altura","peso","genero",
+    "consumo_refeicoes_principais","consumo_vegetais","consumo_agua","frequencia_atividade_fisica","tempo_uso_tecnologia",
+    "fuma","consumo_alimentos_altamente_caloricos","monitoramento_calorias","historico_familiar",
+    "consumo_lanches_entre_refeicoes","consumo_alcool",
+    "meio_de_transporte","nivel_de_obesidade"
+]
+
+# Esquema fixo das partições: todos os lotes têm os mesmos tipos, independente do conteúdo
+SCHEMA_BASE = pa.schema(
+    [('idade', pa.int64()), ('altura', pa.float64()), ('peso', pa.float64()), ('genero', pa.int64())]
+    + [(col, pa.string()) for col in colunas_ordenadas[4:9]]
+    + [(col, pa.int64()) for col in colunas_ordenadas[9:13]]
+    + [(col, pa.string()) for col in colunas_ordenadas[13:]]
+    + [('imc', pa.int64()), ('tendencia_obesidade', pa.int64())]
+)
+
+# ==========================================================================
+# Funções de limpeza (versão por valor, referência do notebook)
+# ==========================================================================
+
+def limpar_numero_float(valor):
+    """
+    Limpa strings numéricas com múltiplos separadores (como pontos ou vírgulas),
+    considerando o último separador como o decimal, e converte para float.
+    """
+    if pd.isna(valor) or valor is None:
+        return np.nan
+
+    # Converte para string, remove espaços e substitui vírgulas por pontos
+    s = str(valor).strip().replace(',', '.')
+
+    # Mantém apenas dígitos e separadores
+    s = ''.join(ch for ch in s if ch.isdigit() or ch in ['.', ','])
+
+    if not s: # Se a string ficar vazia
+        return np.nan
+
+    if s.count('.') + s.count(',') > 0:
+        ultimo_separador_index = max(s.rfind('.'), s.rfind(','))
+
+        if ultimo_separador_index != -1 and ultimo_separador_index < len(s) - 1:
+            # Parte inteira sem os demais separadores + parte decimal
+            parte_inteira = re.sub(r'[.,]', '', s[:ultimo_separador_index])
+            parte_decimal = s[ultimo_separador_index+1:]
+            s = parte_inteira + '.' + parte_decimal
+        else:
+            # Separador apenas no fim (ex: '123.'): remove todos os separadores
+            s = re.sub(r'[.,]', '', s)
+            if not s:
+                 return np.nan
+
+    try:
+        return float(s)
+    except ValueError:
+        return np.nan
+
+
+def limpar_numero_int(valor):
+    """
+    Realiza a limpeza de strings para extração de números inteiros,
+    focando na integridade de dados como idade.
+    """
+    if pd.isna(valor) or valor is None:
+        return np.nan
+
+    # Mantém apenas o que vem antes da primeira pontuação ("25.0" não vira "250", datas não viram números gigantes)
+    s = re.split(r'[.,/]', str(valor).strip())[0]
+
+    # Remove qualquer caractere que não seja um número
+    s_apenas_digitos = re.sub(r'[^0-9]', '', s)
+
+    if not s_apenas_digitos:
+        return np.nan
+
+    try:
+        val = int(s_apenas_digitos)
+        return val if val <= 120 else np.nan # Filtro de sanidade (outliers)
+    except ValueError:
+        return np.nan
+
+# ==========================================================================
+# Funções de limpeza vetorizadas
+# ==========================================================================
+
+def _como_texto(serie):
+    """
+    Converte a coluna para texto (Arrow) e separa os valores ausentes e os
+    que contêm caracteres não ASCII (tratados pela função por valor).
+    """
+    ausentes = serie.isna().to_numpy()
+    texto = pa.array(serie.where(~ausentes, '').astype(str), type=pa.string())
+    especiais = pc.match_substring_regex(texto, r'[^\x00-\x7f]').to_numpy(zero_copy_only=False)
+    return texto, ausentes, especiais
+
+
+def _para_float(texto):
+    """
+    Converte os textos numéricos já limpos para float (mesmo arredondamento do float() do Python).
+    """
+    try:
+        return pc.cast(texto, pa.float64()).to_numpy(zero_copy_only=False)
+    except pa.ArrowInvalid: # Números fora do intervalo do float64 (o Python retorna inf)
+        return np.array([float(v) for v in texto.to_pylist()])
+
+
+def _combinar(serie, valores, especiais, funcao):
+    """
+    Completa os valores especiais com a função por valor e replica o tipo do Series.apply
+    (inteiros sem ausentes permanecem int64).
+    """
+    if especiais.any():
+        valores[especiais] = serie[especiais].map(funcao).to_numpy(dtype=float)
+    resultado = pd.Series(valores, index=serie.index, name=serie.name)
+    if funcao is limpar_numero_int and len(resultado) and not resultado.isna().any():
+        resultado = resultado.astype('int64')
+    return resultado
+
+
+def limpar_serie_float(serie):
+    """
+    Versão vetorizada de limpar_numero_float, com o mesmo resultado para toda a coluna.
+    """
+    texto, ausentes, especiais = _como_texto(serie)
+    s = pc.replace_substring_regex(pc.replace_substring(texto, ',', '.'), r'[^0-9.]', '')
+
+    # O último ponto é o separador decimal; os demais são removidos
+    inteira = pc.replace_substring(pc.replace_substring_regex(s, r'\.[0-9]*$', ''), '.', '')
+    decimal = pc.replace_substring_regex(s, r'^.*\.', '')
+    numero = pc.if_else(
+        pc.match_substring(s, '.'),
+        pc.if_else(pc.equal(decimal, ''), inteira, pc.binary_join_element_wise(inteira, decimal, '.')),
+        s
+    )
+
+    valores = np.full(len(serie), np.nan)
+    validos = ~ausentes & ~especiais & pc.not_equal(numero, '').to_numpy(zero_copy_only=False)
+    valores[validos] = _para_float(numero.filter(pa.array(validos)))
+    return _combinar(serie, valores, especiais, limpar_numero_float)
+
+
+def limpar_serie_int(serie):
+    """
+    Versão vetorizada de limpar_numero_int, com o mesmo resultado para toda a coluna.
+    """
+    texto, ausentes, especiais = _como_texto(serie)
+    digitos = pc.replace_substring_regex(pc.replace_substring_regex(texto, r'(?s)[.,/].*', ''), r'[^0-9]', '')
+
+    # Sem zeros à esquerda, mais de 3 dígitos já ultrapassa o limite de 120
+    significativos = pc.utf8_ltrim(digitos, '0')
+    validos = (
+        ~ausentes & ~especiais
+        & pc.not_equal(digitos, '').to_numpy(zero_copy_only=False)
+        & pc.less_equal(pc.utf8_length(significativos), 3).to_numpy(zero_copy_only=False)
+    )
+
+    valores = np.full(len(serie), np.nan)
+    numeros = pc.if_else(pc.equal(significativos, ''), '0', significativos).filter(pa.array(validos))
+    valores[validos] = pc.cast(numeros, pa.int64()).to_numpy(zero_copy_only=False)
+    valores[valores > 120] = np.nan
+    return _combinar(serie, valores, especiais, limpar_numero_int)
+
+# ==========================================================================
+# Transformação da base
+# ==========================================================================
+
+def risco_obesidade(df):
+    """
+    Define a variável binária de risco (0 ou 1) baseada em critérios
+    clínicos (nível atual) e comportamentais (pontuação de hábitos).
+    """
+    niveis_sobrepeso_obesidade = {
+        'sobrepeso_um', 'sobrepeso_dois',
+        'obesidade_um', 'obesidade_dois', 'obesidade_tres'
+    }
+    cond_obesidade = df['nivel_de_obesidade'].isin(niveis_sobrepeso_obesidade)
+
+    score_habitos = (
+        (df['frequencia_atividade_fisica'].isin(['sedentario', 'baixa'])).astype(int) +
+        (df['consumo_agua'] == 'baixa').astype(int) +
+        (df['consumo_lanches_entre_refeicoes'].isin(['moderada', 'alta'])).astype(int) +
+        (df['historico_familiar'] == 1).astype(int) +
+        (df['tempo_uso_tecnologia'] == 'alta').astype(int) +
+        (df['consumo_alimentos_altamente_caloricos'] == 1).astype(int)
+    )
+    cond_habitos = (score_habitos >= 3)
+
+    return (cond_obesidade | cond_habitos).astype(int)
+
+
+def read_raw(caminho=RAW_PATH, **kwargs):
+    """
+    Lê a base original com as mesmas opções do notebook.
+    """
+    return pd.read_csv(caminho, sep=",", decimal=",", encoding="utf-8", **kwargs)
+
+
+def transformar(df):
+    """
+    Aplica à base original o tratamento do notebook: renomeia as colunas,
+    converte os códigos, limpa idade/altura/peso, remove valores impossíveis,
+    calcula o IMC e a variável alvo tendencia_obesidade.
+    """
+    df_base = df.rename(columns=mapeamento_colunas)
+
+    # Conversões binárias e categóricas (substituição mantém valores fora do mapa, como no notebook)
+    with pd.option_context('future.no_silent_downcasting', True):
+        df_base['genero'] = df_base['genero'].replace(mapa_genero).infer_objects()
+        df_base[colunas_binarias_sim_nao] = df_base[colunas_binarias_sim_nao].replace(mapa_binario_sim_nao).infer_objects()
+
+    df_base['consumo_lanches_entre_refeicoes'] = df_base['consumo_lanches_entre_refeicoes'].map(mapa_frequencia_texto)
+    df_base['consumo_alcool'] = df_base['consumo_alcool'].map(mapa_frequencia_texto)
+    df_base['meio_de_transporte'] = df_base['meio_de_transporte'].map(mapa_transporte)
+    df_base['nivel_de_obesidade'] = df_base['nivel_de_obesidade'].map(mapa_obesidade)
+
+    for col, (mapa, minimo, maximo) in colunas_numericas_categoricas.items():
+        df_base[col] = (
+            pd.to_numeric(df_base[col], errors='coerce')
+            .round()
+            .clip(minimo, maximo)
+            .astype('Int64')
+            .map(mapa)
+        )
+
+    # Limpeza numérica vetorizada (idade, altura, peso)
+    df_base['idade'] = limpar_serie_int(df_base['idade'])
+    df_base['altura'] = limpar_serie_float(df_base['altura'])
+    df_base['peso'] = limpar_serie_float(df_base['peso'])
+
+    # Filtragem de valores impossíveis e ordenação final das colunas
+    df_base = df_base[
+        (df_base['idade'] > 0) &
+        (df_base['altura'].fillna(-1) > 0) &
+        (df_base['peso'].fillna(-1) > 0)
+    ]
+    df_base = df_base[colunas_ordenadas]
+
+    df_base = df_base.assign(imc=lambda x: np.ceil(x['peso'] / (x['altura']**2)).astype(int))
+    df_base['tendencia_obesidade'] = risco_obesidade(df_base)
+    return df_base
+
+
+def _ler_lotes(caminho, inicio, tamanho_lote, colunas):
+    """
+    Lê a base original a partir do byte `inicio`, em lotes de linhas completas.
+    Uma última linha sem quebra de linha (ainda sendo gravada) fica para a próxima execução.
+    Retorna, para cada lote: DataFrame (campos como texto), byte inicial, byte final e hash dos bytes.
+    """
+    with open(caminho, 'rb') as f:
+        f.seek(inicio)
+        while True:
+            linhas = list(islice(f, tamanho_lote))
+            if linhas and not linhas[-1].endswith(b'\n'):
+                linhas.pop()
+            if not linhas:
+                return
+
+            bloco = b''.join(linhas)
+            lote = pd.read_csv(io.BytesIO(bloco), header=None, names=colunas, dtype=str, sep=",", decimal=",", encoding="utf-8")
+            yield lote, inicio, inicio + len(bloco), hashlib.sha256(bloco).hexdigest()
+            inicio += len(bloco)
+
+
+def _gravar_atomico(caminho, escrever):
+    """
+    Grava em arquivo temporário na mesma pasta e renomeia ao final (sem arquivos pela metade).
+    """
+    temporario = caminho.with_name(f".tmp-{os.getpid()}-{caminho.name}")
+    escrever(temporario)
+    os.replace(temporario, caminho)
+
+
+def _gravar_manifesto(pasta, manifesto):
+    conteudo = json.dumps(manifesto, indent=2, ensure_ascii=False)
+    _gravar_atomico(Path(pasta) / MANIFEST_NAME, lambda caminho: caminho.write_text(conteudo, encoding='utf-8'))
+
+
+def load_manifest(pasta=PARTS_PATH):
+    """
+    Manifesto da saída particionada: marca d'água (byte já processado), impressões digitais
+    de cada lote bruto, versão da base e partições alteradas na última execução.
+    """
+    try:
+        return json.loads((Path(pasta) / MANIFEST_NAME).read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return None
+
+
+def _retomar(manifesto, origem, cabecalho):
+    """
+    Confere se a base original apenas cresceu desde a última execução: mesmo cabeçalho,
+    tamanho maior ou igual à marca d'água e todos os lotes já processados inalterados.
+    A conferência é uma leitura sequencial com hash, muito mais barata que reprocessar.
+    """
+    if not manifesto or manifesto['cabecalho'] != hashlib.sha256(cabecalho).hexdigest():
+        return False
+    if Path(origem).stat().st_size < manifesto['marca_dagua']:
+        return False
+
+    with open(origem, 'rb') as f:
+        for particao in manifesto['particoes']:
+            f.seek(particao['inicio'])
+            if hashlib.sha256(f.read(particao['fim'] - particao['inicio'])).hexdigest() != particao['hash_bruto']:
+                return False
+    return True
+
+
+def transformar_em_lotes(origem=RAW_PATH, destino=PARTS_PATH, tamanho_lote=LOTE_PADRAO, incremental=False):
+    """
+    Processa a base original em lotes de tamanho fixo, sem carregá-la inteira na memória,
+    gravando cada lote tratado como uma partição Parquet (part-00000.parquet, ...) com esquema fixo.
+    Os campos são lidos como texto, para que a inferência de tipos não varie entre lotes.
+
+    No modo incremental, apenas os registros após a marca d'água do manifesto são processados
+    e acrescentados como novas partições; se a base original tiver sido reescrita, ela é reprocessada.
+    Retorna as estatísticas do processamento (linhas, partições, linhas/s e pico de RSS).
+    """
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    with open(origem, 'rb') as f:
+        cabecalho = f.readline()
+    colunas = pd.read_csv(io.BytesIO(cabecalho), nrows=0, encoding="utf-8").columns.tolist()
+
+    manifesto = load_manifest(destino)
+    modo = 'incremental' if incremental and _retomar(manifesto, origem, cabecalho) else 'completo'
+    if modo == 'completo':
+        for antiga in destino.glob('part-*.parquet'): # Reprocessamento completo: descarta as partições anteriores
+            antiga.unlink()
+        manifesto = {
+            'origem': str(origem), 'cabecalho': hashlib.sha256(cabecalho).hexdigest(),
+            'marca_dagua': len(cabecalho), 'versao': None, 'particoes': []
+        }
+    manifesto['alteradas'] = []
+
+    processo = psutil.Process()
+    pico_rss = processo.memory_info().rss
+    inicio = time.perf_counter()
+    lidas = gravadas = 0
+
+    for lote, byte_inicial, byte_final, hash_bruto in _ler_lotes(origem, manifesto['marca_dagua'], tamanho_lote, colunas):
+        tabela = pa.Table.from_pandas(transformar(lote), schema=SCHEMA_BASE, preserve_index=False)
+        nome = f"part-{len(manifesto['particoes']):05d}.parquet"
+        _gravar_atomico(destino / nome, lambda caminho: pq.write_table(tabela, caminho))
+
+        # O manifesto só avança depois que a partição está completa no disco
+        manifesto['particoes'].append({
+            'arquivo': nome, 'inicio': byte_inicial, 'fim': byte_final,
+            'hash_bruto': hash_bruto, 'linhas': tabela.num_rows
+        })
+        manifesto['marca_dagua'] = byte_final
+        manifesto['versao'] = hashlib.sha256(f"{manifesto['versao']}:{hash_bruto}".encode()).hexdigest()[:16]
+        manifesto['alteradas'].append(nome)
+        _gravar_manifesto(destino, manifesto)
+
+        lidas += len(lote)
+        gravadas += tabela.num_rows
+        pico_rss = max(pico_rss, processo.memory_info().rss)
+
+    # Gravado também ao final: uma execução sem lotes novos (ou de uma base vazia) registra
+    # 'alteradas' vazio e, no reprocessamento completo, as partições descartadas
+    _gravar_manifesto(destino, manifesto)
+    duracao = time.perf_counter() - inicio
+    return {
+        'modo': modo,
+        'linhas_lidas': lidas,
+        'linhas_gravadas': gravadas,
+        'particoes': len(manifesto['particoes']),
+        'alteradas': manifesto['alteradas'],
+        'versao': manifesto['versao'],
+        'linhas_por_segundo': round(lidas / duracao) if duracao else 0,
+        'pico_rss_mb': round(pico_rss / 1024 ** 2, 1)
+    }
+
+
+def read_partitions(pasta=PARTS_PATH, particoes=None):
+    """
+    Lê as partições registradas no manifesto (ou apenas as informadas) como um DataFrame.
+    """
+    manifesto = load_manifest(pasta)
+    if particoes is None:
+        particoes = [p['arquivo'] for p in manifesto['particoes']] if manifesto else []
+    if not particoes:
+        return SCHEMA_BASE.empty_table().to_pandas()
+    return pa.concat_tables([pq.read_table(Path(pasta) / nome, schema=SCHEMA_BASE) for nome in particoes]).to_pandas()
+
+
+def verificar_limpeza(df=None, n_aleatorios=200_000, semente=0):
+    """
+    Confere que as versões vetorizadas reproduzem as funções por valor, na base
+    original e em textos aleatórios (dígitos, separadores, letras, espaços e Unicode).
+    Retorna a quantidade de divergências de cada função.
+    """
+    rng = np.random.default_rng(semente)
+    alfabeto = list('0123456789') * 3 + list('.,/ -eE+') + list('abcxyz') + ['\t', '²', '٣', 'ç', '½', '０']
+    tamanhos = rng.integers(0, 12, n_aleatorios)
+    textos = [''.join(rng.choice(alfabeto, t)) for t in tamanhos]
+    amostras = [pd.Series(textos + [None, np.nan, '', ' ', 12, 21.0, 1e16, 1e-05, '9' * 400, '0' * 10 + '7'], dtype=object)]
+    if df is not None:
+        amostras += [df[col] for col in ('Age', 'Height', 'Weight') if col in df]
+
+    divergencias = {}
+    for nome, vetorizada, por_valor in (('float', limpar_serie_float, limpar_numero_float), ('int', limpar_serie_int, limpar_numero_int)):
+        total = 0
+        for serie in amostras:
+            esperado = serie.apply(por_valor)
+            obtido = vetorizada(serie)
+            if esperado.dtype != obtido.dtype:
+                total += len(serie)
+                continue
+            iguais = (esperado == obtido) | (esperado.isna() & obtido.isna())
+            total += int((~iguais).sum())
+        divergencias[nome] = total
+    return divergencias
+
+
+def main(): # Função principal
+    parser = argparse.ArgumentParser(description="Gera o df_base.csv a partir da base original (Obesity.csv).")
+    parser.add_argument('--origem', default=RAW_PATH, help="CSV bruto no formato do Obesity.csv.")
+    parser.add_argument('--destino', default=DATA_PATH, help="CSV tratado de saída.")
+    parser.add_argument('--particionado', metavar='PASTA', help="Processa em lotes e grava partições Parquet na pasta (ex: data_processed/df_base).")
+    parser.add_argument('--lote', type=int, default=LOTE_PADRAO, help="Registros por lote no modo particionado.")
+    parser.add_argument('--incremental', action='store_true', help="No modo particionado, processa apenas os registros novos (marca d'água).")
+    parser.add_argument('--verificar', action='store_true', help="Confere a limpeza vetorizada contra as funções por valor.")
+    args = parser.parse_args()
+
+    print("-" * 30)
+    if args.particionado:
+        stats = transformar_em_lotes(args.origem, args.particionado, args.lote, args.incremental)
+        print(f"✅ Modo {stats['modo']}: {stats['linhas_gravadas']} de {stats['linhas_lidas']} pacientes tratados")
+        print(f"🧩 Partições: {stats['particoes']} | alteradas: {stats['alteradas']} | versão: {stats['versao']}")
+        print(f"⏱️ {stats['linhas_por_segundo']} linhas/s | pico de RSS: {stats['pico_rss_mb']} MB")
+        print(f"📁 Pasta: {args.particionado}")
+    else:
+        inicio = time.perf_counter()
+        df = read_raw(args.origem)
+        df_base = transformar(df)
+        Path(args.destino).parent.mkdir(parents=True, exist_ok=True)
+        df_base.to_csv(args.destino, index=False, encoding='utf-8-sig')
+        print(f"✅ {len(df_base)} de {len(df)} pacientes tratados em {time.perf_counter() - inicio:.2f}s")
+        print(f"📄 Arquivo: {args.destino}")
+
+    if args.verificar:
+        print(f"🔎 Divergências da limpeza vetorizada: {verificar_limpeza(read_raw(args.origem, nrows=LOTE_PADRAO))}")
+    print("-" * 30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from fast_encoder import FastEncoder
+from forest_engine import CompiledForest
+from latency import LatencyTracker
+from model_utils import FEATURES, MODEL_PATH, load_cli_model
+from what_if import HABITOS
+
+# ==========================================================================
+# Constantes
+# ==========================================================================
+CLASSE_RISCO = 1
+ROTULOS = {
+    'idade': 'Idade',
+    'genero': 'Gênero',
+    'historico_familiar': 'Histórico familiar',
+    'imc': 'IMC',
+    **{col: rotulo for col, (rotulo, _) in HABITOS.items()}
+}
+
+# ==========================================================================
+# Classes
+# ==========================================================================
+
+class Explainer:
+    """
+    Explicação local de cada predição: contribuição de cada um dos 15 campos do
+    formulário para a probabilidade de risco, a partir dos caminhos de decisão da
+    floresta compilada. As colunas do one-hot são somadas de volta ao campo original
+    (campos que o modelo descarta, como o IMC, ficam com contribuição zero).
+    """
+    def __init__(self, engine, encoder):
+        self.engine = engine
+        self.encoder = encoder
+        self.classe = int(np.flatnonzero(engine.classes_ == CLASSE_RISCO)[0])
+
+        # Matriz (colunas codificadas x campos) que soma o one-hot por campo
+        origem = encoder.source_columns()
+        self._agregacao = np.zeros((len(origem), len(FEATURES)))
+        self._agregacao[np.arange(len(origem)), [FEATURES.index(col) for col in origem]] = 1.0
+
+    def explain_matrix(self, X):
+        """
+        Retorna (probabilidade base, contribuições por campo) para a matriz já codificada.
+        """
+        bias, contribuicoes = self.engine.contributions(X)
+        return bias[self.classe], contribuicoes[:, :, self.classe] @ self._agregacao
+
+    def explain(self, paciente):
+        """
+        Explica um paciente (dict): probabilidade base da floresta e uma Series com a
+        contribuição de cada campo, ordenada pelo impacto absoluto.
+        """
+        base, contribuicoes = self.explain_matrix(self.encoder.transform_one(paciente))
+        serie = pd.Series(contribuicoes[0], index=FEATURES)
+        return base, serie.reindex(serie.abs().sort_values(ascending=False).index)
+
+# ==========================================================================
+# Funções
+# ==========================================================================
+
+def check_additivity(model, explainer, input_df):
+    """
+    Confere se base + soma das contribuições reproduz o predict_proba do sklearn.
+    """
+    X = explainer.encoder.transform(input_df)
+    base, contribuicoes = explainer.explain_matrix(X)
+    esperado = model.named_steps['classifier'].predict_proba(X)[:, explainer.classe]
+    return {
+        'linhas': len(input_df),
+        'diferenca_maxima': float(np.abs(base + contribuicoes.sum(axis=1) - esperado).max())
+    }
+
+
+def benchmark(explainer, pacientes, repeticoes=500):
+    """
+    Latência (ms) de uma explicação completa (codificação + caminhos + agregação), um paciente por vez.
+    """
+    tracker = LatencyTracker(janela=repeticoes)
+    for i in range(repeticoes):
+        with tracker.stage('explicacao'):
+            explainer.explain(pacientes[i % len(pacientes)])
+    return tracker.summary()['explicacao']
+
+
+def main(): # Função principal
+    parser = argparse.ArgumentParser(description="Verifica as contribuições locais por campo (caminhos de decisão da floresta).")
+    parser.add_argument('--modelo', default=MODEL_PATH, help="Pipeline treinado (.joblib).")
+    parser.add_argument('--verificar', metavar='CSV', required=True, help="Base (ex: df_base.csv) usada na verificação e no benchmark.")
+    args = parser.parse_args()
+
+    model = load_cli_model(args.modelo)
+    explainer = Explainer(CompiledForest.from_pipeline(model), FastEncoder.from_pipeline(model))
+    df = pd.read_csv(args.verificar, encoding='utf-8-sig')[FEATURES]
+    pacientes = df.to_dict('records')
+
+    base, contribuicoes = explainer.explain(pacientes[0])
+    print("-" * 30)
+    print(f"🔎 Aditividade: {check_additivity(model, explainer, df)}")
+    print(f"⏱️ Latência por paciente (ms): {benchmark(explainer, pacientes)}")
+    print(f"🧩 Exemplo: base {base:.3f} | " + ", ".join(f"{col} {valor:+.3f}" for col, valor in contribuicoes.head(5).items()))
+    print("-" * 30)
+
+
+if __name__ == "__main__":
+    main()
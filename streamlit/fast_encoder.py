@@ -0,0 +1,186 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from model_utils import FEATURES, MODEL_PATH, load_cli_model
+
+# ==========================================================================
+# Classes
+# ==========================================================================
+
+class FastEncoder:
+    """
+    Versão pré-compilada do ColumnTransformer ajustado (StandardScaler + OneHotEncoder):
+    média/escala guardadas para as numéricas e tabelas de consulta (categoria -> coluna)
+    para o one-hot. Um paciente em dict vira o vetor do modelo sem montar DataFrame,
+    com resultado bit a bit idêntico ao pipeline[:-1].transform.
+    """
+    def __init__(self, numericas, categoricas, n_saida):
+        self.numericas = numericas # [(coluna, média ou None, escala ou None)]
+        self.categoricas = categoricas # [(coluna, deslocamento, {categoria: índice}, ignorar_desconhecidas)]
+        self.n_saida = n_saida
+        self._n_num = len(numericas)
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor):
+        """
+        Extrai os parâmetros do ColumnTransformer treinado do projeto.
+        """
+        if getattr(preprocessor, 'sparse_output_', False) or preprocessor.remainder != 'drop':
+            raise TypeError("Apenas ColumnTransformer com saída densa e remainder='drop' é suportado.")
+
+        numericas, categoricas, deslocamento = [], [], 0
+        for _, transformador, colunas in preprocessor.transformers_:
+            if transformador == 'drop':
+                continue
+            if isinstance(transformador, StandardScaler):
+                if deslocamento != len(numericas):
+                    raise TypeError("As colunas numéricas devem vir antes das categóricas.")
+                for j, col in enumerate(colunas):
+                    media = None if transformador.mean_ is None else transformador.mean_[j]
+                    escala = None if transformador.scale_ is None else transformador.scale_[j]
+                    numericas.append((col, media, escala))
+                deslocamento += len(colunas)
+            elif isinstance(transformador, OneHotEncoder) and transformador.drop is None:
+                ignorar = transformador.handle_unknown != 'error'
+                for col, categorias in zip(colunas, transformador.categories_):
+                    tabela = {categoria: i for i, categoria in enumerate(categorias.tolist())}
+                    categoricas.append((col, deslocamento, tabela, ignorar))
+                    deslocamento += len(categorias)
+            else:
+                raise TypeError(f"Transformador não suportado: {transformador!r}")
+
+        return cls(numericas, categoricas, deslocamento)
+
+    @classmethod
+    def from_pipeline(cls, model):
+        return cls.from_preprocessor(model.named_steps['preprocessor'])
+
+    def source_columns(self):
+        """
+        Campo original de cada coluna da saída (as colunas do one-hot repetem o campo).
+        """
+        campos = [col for col, _, _ in self.numericas]
+        for col, _, tabela, _ in self.categoricas:
+            campos += [col] * len(tabela)
+        return campos
+
+    def transform_one(self, paciente):
+        """
+        Codifica um paciente (dict com as features) em uma matriz 1 x n_saida.
+        """
+        linha = np.zeros((1, self.n_saida))
+        for j, (col, media, escala) in enumerate(self.numericas):
+            valor = np.float64(paciente[col]) # Mesma aritmética em float64 do StandardScaler
+            if media is not None:
+                valor -= media
+            if escala is not None:
+                valor /= escala
+            linha[0, j] = valor
+
+        for col, deslocamento, tabela, ignorar in self.categoricas:
+            indice = tabela.get(paciente[col])
+            if indice is not None:
+                linha[0, deslocamento + indice] = 1.0
+            elif not ignorar:
+                raise ValueError(f"Categoria desconhecida em '{col}': {paciente[col]!r}")
+        return linha
+
+    def transform(self, df):
+        """
+        Codificação vetorizada de um DataFrame (lote de pacientes).
+        """
+        saida = np.zeros((len(df), self.n_saida))
+        if self.numericas:
+            valores = df[[col for col, _, _ in self.numericas]].to_numpy(dtype=np.float64)
+            for j, (_, media, escala) in enumerate(self.numericas):
+                if media is not None:
+                    valores[:, j] -= media
+                if escala is not None:
+                    valores[:, j] /= escala
+            saida[:, :self._n_num] = valores
+
+        linhas = np.arange(len(df))
+        for col, deslocamento, tabela, ignorar in self.categoricas:
+            indices = pd.Index(list(tabela)).get_indexer(df[col])
+            conhecidas = indices >= 0
+            if not ignorar and not conhecidas.all():
+                raise ValueError(f"Categoria desconhecida em '{col}': {df[col][~conhecidas].iloc[0]!r}")
+            saida[linhas[conhecidas], deslocamento + indices[conhecidas]] = 1.0
+        return saida
+
+# ==========================================================================
+# Funções
+# ==========================================================================
+
+def check_parity(model, encoder, input_df):
+    """
+    Compara o encoder com o pipeline[:-1].transform, em lote e paciente a paciente (dict),
+    incluindo categorias desconhecidas. 'identicos' exige igualdade bit a bit.
+    """
+    esperado = model[:-1].transform(input_df)
+    lote = encoder.transform(input_df)
+    por_paciente = np.vstack([encoder.transform_one(p) for p in input_df.to_dict('records')])
+
+    # Categorias inexistentes no treino (one-hot zerado, como handle_unknown='ignore')
+    desconhecidos = input_df.head(50).copy()
+    for col, _, _, _ in encoder.categoricas:
+        if desconhecidos[col].dtype == object:
+            desconhecidos.loc[desconhecidos.index[::2], col] = 'desconhecida'
+    esperado_desconhecidos = model[:-1].transform(desconhecidos)
+
+    def bits(a, b):
+        return a.shape == b.shape and a.dtype == b.dtype and bool(np.array_equal(a.view(np.int64), b.view(np.int64)))
+
+    return {
+        'linhas': len(input_df),
+        'identicos_lote': bits(esperado, lote),
+        'identicos_dict': bits(esperado, por_paciente),
+        'identicos_desconhecidas': bits(esperado_desconhecidos, encoder.transform(desconhecidos))
+            and bits(esperado_desconhecidos, np.vstack([encoder.transform_one(p) for p in desconhecidos.to_dict('records')]))
+    }
+
+
+def benchmark(model, encoder, paciente, repeticoes=2000):
+    """
+    Tempo mediano (µs) para codificar um paciente: DataFrame + ColumnTransformer vs. encoder.
+    """
+    resultados = {}
+    caminhos = {
+        'dataframe_sklearn': lambda: model[:-1].transform(pd.DataFrame(paciente, index=[0])),
+        'encoder_dict': lambda: encoder.transform_one(paciente)
+    }
+    for nome, funcao in caminhos.items():
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+        resultados[nome] = round(float(np.median(tempos)) * 1e6, 1)
+    return resultados
+
+
+def main(): # Função principal
+    parser = argparse.ArgumentParser(description="Verifica o encoder rápido contra o pré-processamento do pipeline.")
+    parser.add_argument('--modelo', default=MODEL_PATH, help="Pipeline treinado (.joblib).")
+    parser.add_argument('--verificar', metavar='CSV', required=True, help="Base (ex: df_base.csv) usada na paridade e no benchmark.")
+    args = parser.parse_args()
+
+    model = load_cli_model(args.modelo)
+    encoder = FastEncoder.from_pipeline(model)
+    df = pd.read_csv(args.verificar, encoding='utf-8-sig')[FEATURES]
+
+    print("-" * 30)
+    print(f"🔎 Paridade: {check_parity(model, encoder, df)}")
+    print(f"⏱️ Um paciente (µs): {benchmark(model, encoder, df.iloc[0].to_dict())}")
+    print("-" * 30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import numpy as np
+import pandas as pd
+
+# ==========================================================================
+# Classes
+# ==========================================================================
+
+class BitmapIndex:
+    """
+    Índice para os filtros do dashboard: um bitmap compactado (1 bit por paciente)
+    para cada par (coluna, valor) e um índice ordenado para o filtro de faixa.
+    A seleção é um AND bit a bit entre bitmaps, sem criar DataFrames intermediários.
+    """
+    def __init__(self, df, colunas, coluna_faixa='idade'):
+        self.n = len(df)
+        self.colunas = list(colunas)
+        self.coluna_faixa = coluna_faixa
+
+        # Um bitmap por valor distinto de cada coluna de filtro
+        self.bitmaps = {}
+        for col in self.colunas:
+            codigos, valores = _fatorar(df[col])
+            for i, valor in enumerate(valores):
+                self.bitmaps[(col, valor)] = np.packbits(codigos == i)
+
+        # Valores da coluna de faixa ordenados (ausentes ao final) e as posições correspondentes
+        faixa = df[coluna_faixa].to_numpy(dtype=float)
+        self._ordem_faixa = np.argsort(faixa, kind='stable')
+        self._faixa_ordenada = faixa[self._ordem_faixa]
+        self._todos = np.packbits(np.ones(self.n, dtype=bool))
+
+    def range_bitmap(self, minimo, maximo):
+        """
+        Bitmap dos pacientes com minimo <= valor <= maximo (mesmo critério do Series.between).
+        """
+        inicio = np.searchsorted(self._faixa_ordenada, minimo, side='left')
+        fim = np.searchsorted(self._faixa_ordenada, maximo, side='right')
+        mascara = np.zeros(self.n, dtype=bool)
+        mascara[self._ordem_faixa[inicio:fim]] = True
+        return np.packbits(mascara)
+
+    def select(self, faixa=None, filtros=None):
+        """
+        Retorna as posições (em ordem crescente) dos pacientes que atendem à faixa
+        e a todos os filtros {coluna: valor}; valores None são ignorados ("Todos").
+        """
+        bits = self.range_bitmap(*faixa) if faixa is not None else self._todos.copy()
+
+        for col, valor in (filtros or {}).items():
+            if valor is None:
+                continue
+            bitmap = self.bitmaps.get((col, valor))
+            if bitmap is None: # Valor inexistente na base: nenhum paciente atende
+                return np.empty(0, dtype=np.intp)
+            np.bitwise_and(bits, bitmap, out=bits)
+
+        return np.flatnonzero(np.unpackbits(bits, count=self.n))
+
+# ==========================================================================
+# Funções
+# ==========================================================================
+
+def _fatorar(serie):
+    """
+    Converte a coluna em códigos inteiros e valores distintos em tipos nativos do Python.
+    """
+    codigos, valores = pd.factorize(serie)
+    return codigos, [v.item() if hasattr(v, 'item') else v for v in valores]
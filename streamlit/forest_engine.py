@@ -0,0 +1,326 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import argparse
+import os
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.pipeline import Pipeline
+
+from model_store import ModelStore
+from model_utils import FEATURES, MODEL_PATH, load_cli_model
+
+# ==========================================================================
+# Constantes
+# ==========================================================================
+BLOCO_LINHAS = 8_192 # Limita a matriz (pacientes x árvores) avaliada de uma só vez
+INTERVALO_COMPACTACAO = 3 # A cada N níveis, caminhos que já chegaram à folha saem do cálculo
+
+# ==========================================================================
+# Classes
+# ==========================================================================
+
+class CompiledForest:
+    """
+    Floresta achatada em arrays contíguos do NumPy (feature, threshold, filhos
+    e valores das folhas), avaliada de forma vetorizada para todas as árvores
+    e todos os pacientes do lote ao mesmo tempo.
+    """
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'missing_left', 'value', 'roots')
+    # Acima desse tamanho de lote a travessia em Cython do próprio sklearn passa a ser mais rápida
+    max_rows = 256
+
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots, max_depth, n_features, classes,
+                 filhos=None, folha=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.classes_ = np.asarray(classes)
+
+        # Estruturas auxiliares da travessia: filhos intercalados (direita, esquerda) e marcação das folhas.
+        # Quando vêm do arquivo (mmap), também são compartilhadas entre processos.
+        self._filhos = np.stack([self.right, self.left], axis=1).ravel() if filhos is None else filhos
+        self._folha = self.left == np.arange(self.n_nodes, dtype=self.left.dtype) if folha is None else folha
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_estimator(cls, forest):
+        """
+        Exporta um RandomForestClassifier treinado para o formato em arrays.
+        """
+        if not hasattr(forest, 'estimators_') or forest.n_outputs_ != 1:
+            raise TypeError("Apenas RandomForestClassifier treinado com uma única saída é suportado.")
+
+        feature, threshold, left, right, missing_left, value, roots = [], [], [], [], [], [], []
+        deslocamento = 0
+
+        for estimador in forest.estimators_:
+            tree = estimador.tree_
+            ids = np.arange(tree.node_count)
+            folha = tree.children_left == -1
+
+            # As folhas apontam para si mesmas, assim todas as árvores avançam juntas até a profundidade máxima
+            left.append(np.where(folha, ids, tree.children_left) + deslocamento)
+            right.append(np.where(folha, ids, tree.children_right) + deslocamento)
+            feature.append(np.where(folha, 0, tree.feature))
+            threshold.append(tree.threshold)
+            missing_left.append(tree.missing_go_to_left.astype(bool))
+
+            # Mesma normalização aplicada pelo DecisionTreeClassifier.predict_proba
+            proba = tree.value[:, 0, :].copy()
+            normalizador = proba.sum(axis=1)[:, None]
+            normalizador[normalizador == 0.0] = 1.0
+            value.append(proba / normalizador)
+
+            roots.append(deslocamento)
+            deslocamento += tree.node_count
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(feature), dtype=np.int32),
+            threshold=np.ascontiguousarray(np.concatenate(threshold), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(left), dtype=np.int32),
+            right=np.ascontiguousarray(np.concatenate(right), dtype=np.int32),
+            missing_left=np.ascontiguousarray(np.concatenate(missing_left)),
+            value=np.ascontiguousarray(np.concatenate(value), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max(e.tree_.max_depth for e in forest.estimators_),
+            n_features=forest.n_features_in_,
+            classes=forest.classes_
+        )
+
+    @classmethod
+    def from_pipeline(cls, model):
+        """
+        Exporta a floresta do Pipeline (preprocessor + classifier) do projeto.
+        """
+        return cls.from_estimator(model.named_steps['classifier'])
+
+    def save(self, caminho):
+        """
+        Salva os arrays sem compressão, permitindo o carregamento via mmap.
+        """
+        Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+        conteudo = {nome: getattr(self, nome) for nome in self.ARRAYS}
+        conteudo.update(max_depth=self.max_depth, n_features=self.n_features, classes=self.classes_,
+                        filhos=self._filhos, folha=self._folha)
+        joblib.dump(conteudo, caminho)
+        return caminho
+
+    @classmethod
+    def load(cls, caminho, mmap_mode=None):
+        return cls(**joblib.load(caminho, mmap_mode=mmap_mode))
+
+    def apply(self, X):
+        """
+        Retorna o índice (global) da folha alcançada em cada árvore: matriz (pacientes x árvores).
+        Todos os pares (paciente, árvore) avançam um nível por iteração em arrays planos.
+        """
+        n, n_features = X.shape
+        X_plano = np.asarray(X, dtype=np.float64).ravel()
+        tem_ausentes = bool(np.isnan(X_plano).any())
+
+        folhas = np.tile(self.roots, n)
+        base = np.repeat(np.arange(n, dtype=np.int64) * n_features, self.n_trees)
+        ativos = np.arange(folhas.size)
+        atuais = folhas.copy()
+
+        for nivel in range(self.max_depth):
+            if ativos.size == 0:
+                break
+
+            valores = X_plano[base + self.feature[atuais]]
+            esquerda = valores <= self.threshold[atuais]
+            if tem_ausentes:
+                # Mesmo critério do sklearn: valores ausentes seguem a direção aprendida no treino
+                esquerda |= np.isnan(valores) & self.missing_left[atuais]
+            atuais = self._filhos[2 * atuais + esquerda]
+
+            # Remove periodicamente os caminhos encerrados (as folhas apontam para si mesmas)
+            if nivel % INTERVALO_COMPACTACAO == INTERVALO_COMPACTACAO - 1:
+                fim = self._folha[atuais]
+                folhas[ativos[fim]] = atuais[fim]
+                ativos, atuais, base = ativos[~fim], atuais[~fim], base[~fim]
+
+        folhas[ativos] = atuais
+        return folhas.reshape(n, self.n_trees)
+
+    def contributions(self, X):
+        """
+        Decompõe as probabilidades pelos caminhos de decisão (método de Saabas): em cada nó
+        percorrido, a variação do valor do nó pai para o filho é atribuída à feature do split.
+        Retorna (bias, contribuicoes), com bias (classes,) e contribuicoes (pacientes x features x classes);
+        bias + soma das contribuições reproduz o predict_proba.
+        """
+        if sparse.issparse(X):
+            X = X.toarray()
+        X = np.asarray(np.asarray(X, dtype=np.float32), dtype=np.float64) # Mesma comparação em float32 das árvores
+        n, n_features = X.shape
+        n_classes = self.value.shape[1]
+        X_plano = X.ravel()
+        tem_ausentes = bool(np.isnan(X_plano).any())
+
+        atuais = np.tile(self.roots, n)
+        linhas = np.repeat(np.arange(n, dtype=np.int64), self.n_trees)
+        soma = np.zeros((n_classes, n * n_features))
+
+        for _ in range(self.max_depth):
+            features = self.feature[atuais]
+            posicao = linhas * n_features + features
+            valores = X_plano[posicao]
+            esquerda = valores <= self.threshold[atuais]
+            if tem_ausentes:
+                esquerda |= np.isnan(valores) & self.missing_left[atuais]
+            proximos = self._filhos[2 * atuais + esquerda]
+
+            variacao = self.value[proximos] - self.value[atuais]
+            for c in range(n_classes):
+                soma[c] += np.bincount(posicao, weights=variacao[:, c], minlength=n * n_features)
+
+            # Caminhos que chegaram à folha não contribuem mais
+            ativos = ~self._folha[proximos]
+            atuais, linhas = proximos[ativos], linhas[ativos]
+            if atuais.size == 0:
+                break
+
+        bias = self.value[self.roots].mean(axis=0)
+        contribuicoes = soma.T.reshape(n, n_features, n_classes) / self.n_trees
+        return bias, contribuicoes
+
+    def predict_proba(self, X):
+        """
+        Probabilidades por classe, equivalentes ao RandomForestClassifier.predict_proba.
+        """
+        if sparse.issparse(X):
+            X = X.toarray()
+        # As árvores do sklearn comparam os dados em float32
+        X = np.asarray(X, dtype=np.float32)
+
+        saida = np.empty((X.shape[0], len(self.classes_)), dtype=np.float64)
+        for inicio in range(0, X.shape[0], BLOCO_LINHAS):
+            bloco = X[inicio:inicio + BLOCO_LINHAS]
+            valores = self.value[self.apply(bloco)]
+            # Soma sequencial árvore a árvore, na mesma ordem de acumulação do sklearn
+            saida[inicio:inicio + BLOCO_LINHAS] = np.cumsum(valores, axis=1)[:, -1] / self.n_trees
+
+        return saida
+
+# ==========================================================================
+# Funções
+# ==========================================================================
+
+def load_forest(model, versao, store=None):
+    """
+    Carrega a floresta compilada da versão do modelo via mmap (páginas compartilhadas
+    entre processos). Na primeira vez, exporta os arrays para o repositório local.
+    """
+    store = store or ModelStore()
+    caminho = store.object_path(versao, '.forest.joblib')
+    if not caminho.exists():
+        temporario = caminho.with_name(f".tmp-{os.getpid()}-{caminho.name}")
+        CompiledForest.from_pipeline(model).save(temporario)
+        os.replace(temporario, caminho)
+    return CompiledForest.load(caminho, mmap_mode='r')
+
+
+def load_serving_model(versao, store=None):
+    """
+    Pipeline enxuto para os processos de serviço: o pré-processamento (pequeno) e a
+    floresta compilada via mmap, sem desserializar as árvores do sklearn. Os arrays
+    ficam no page cache e são compartilhados, somente leitura, por todos os processos.
+    """
+    store = store or ModelStore()
+    caminho = store.object_path(versao, '.preprocessor.joblib')
+    if not (caminho.exists() and store.object_path(versao, '.forest.joblib').exists()):
+        model = store.load(versao)
+        load_forest(model, versao, store)
+        temporario = caminho.with_name(f".tmp-{os.getpid()}-{caminho.name}")
+        joblib.dump(model.named_steps['preprocessor'], temporario)
+        os.replace(temporario, caminho)
+
+    forest = CompiledForest.load(store.object_path(versao, '.forest.joblib'), mmap_mode='r')
+    return Pipeline(steps=[('preprocessor', joblib.load(caminho)), ('classifier', forest)])
+
+
+def check_parity(model, forest, input_df):
+    """
+    Compara a floresta compilada com o predict_proba do sklearn.
+    Retorna a maior diferença absoluta e a concordância das classes.
+    """
+    X = model.named_steps['preprocessor'].transform(input_df)
+    esperado = model.named_steps['classifier'].predict_proba(X)
+    obtido = forest.predict_proba(X)
+
+    return {
+        'linhas': len(input_df),
+        'diferenca_maxima': float(np.abs(esperado - obtido).max()),
+        'identicos': bool(np.array_equal(esperado, obtido)),
+        'classes_iguais': bool(np.array_equal(esperado.argmax(axis=1), obtido.argmax(axis=1)))
+    }
+
+
+def benchmark(model, forest, input_df, tamanhos=(1, 16, 64, 256, 1024), repeticoes=50):
+    """
+    Mede a vazão (linhas/s, mediana) do sklearn e da floresta compilada para cada tamanho de lote.
+    """
+    X = model.named_steps['preprocessor'].transform(input_df)
+    classifier = model.named_steps['classifier']
+    resultados = {}
+
+    for tamanho in tamanhos:
+        lote = X[:tamanho]
+        resultados[len(lote)] = {}
+        for nome, funcao in (('sklearn', classifier.predict_proba), ('compilado', forest.predict_proba)):
+            tempos = []
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                funcao(lote)
+                tempos.append(time.perf_counter() - inicio)
+            resultados[len(lote)][nome] = round(len(lote) / float(np.median(tempos)))
+
+    return resultados
+
+
+def main(): # Função principal
+    parser = argparse.ArgumentParser(description="Exporta e verifica a floresta compilada em arrays do NumPy.")
+    parser.add_argument('--modelo', default=MODEL_PATH, help="Pipeline treinado (.joblib).")
+    parser.add_argument('--saida', help="Grava a floresta compilada (o serviço usa a cópia derivada no repositório local).")
+    parser.add_argument('--verificar', metavar='CSV', help="Base (ex: df_base.csv) usada na verificação de paridade e no benchmark.")
+    args = parser.parse_args()
+
+    model = load_cli_model(args.modelo)
+    forest = CompiledForest.from_pipeline(model)
+
+    print("-" * 30)
+    print(f"✅ Floresta compilada: {forest.n_trees} árvores, {forest.n_nodes} nós, profundidade {forest.max_depth}")
+    if args.saida:
+        forest.save(args.saida)
+        print(f"📄 Arquivo: {args.saida}")
+
+    if args.verificar:
+        df = pd.read_csv(args.verificar, encoding='utf-8-sig')[FEATURES]
+        print(f"🔎 Paridade: {check_parity(model, forest, df)}")
+        for tamanho, vazao in benchmark(model, forest, df).items():
+            print(f"⏱️ Lote de {tamanho}: {vazao} linhas/s")
+    print("-" * 30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+import pandas as pd
+import psutil
+from sklearn.preprocessing import OneHotEncoder
+
+from forest_engine import load_forest, load_serving_model
+from latency import LatencyTracker
+from model_store import ModelStore
+from model_utils import FEATURES, LIMIAR_PADRAO, artifact_version, load_model, predict_risk
+
+# ==========================================================================
+# Constantes
+# ==========================================================================
+HOST_PADRAO = '127.0.0.1'
+PORTA_PADRAO = 8502
+JANELA_MS = 5 # Tempo máximo que a primeira requisição do lote espera por companhia
+TAMANHO_LOTE = 256 # Limite de pacientes por lote (igual ao max_rows da floresta compilada)
+FILA_MAXIMA = 4096 # Acima disso, novas requisições recebem 503 (backpressure)
+TEMPO_INICIO = 120 # Segundos que cada processo tem para carregar o modelo
+CORPO_MAXIMO = 16 * 1024 # Bytes aceitos no corpo da requisição (um paciente em JSON tem menos de 1 KB)
+
+STATUS_HTTP = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large', 503: 'Service Unavailable'}
+
+# ==========================================================================
+# Classes
+# ==========================================================================
+
+class Sobrecarga(Exception):
+    """
+    A fila de predições está cheia: o cliente deve tentar novamente mais tarde.
+    """
+
+
+class MicroBatcher:
+    """
+    Agrupa as requisições concorrentes em lotes: o primeiro paciente da fila espera
+    no máximo janela_ms (ou até o lote atingir tamanho_maximo) e todos são pontuados
+    com uma única chamada de predict_proba, fora do loop de eventos.
+    """
+    def __init__(self, model, engine=None, janela_ms=JANELA_MS, tamanho_maximo=TAMANHO_LOTE,
+                 fila_maxima=FILA_MAXIMA, tracker=None):
+        self.model = model
+        self.engine = engine
+        self.janela = janela_ms / 1000
+        self.tamanho_maximo = tamanho_maximo
+        self.tracker = tracker or LatencyTracker()
+        self.fila = asyncio.Queue(maxsize=fila_maxima)
+        self.fila_pico = 0
+        self.requisicoes = 0
+        self.rejeitadas = 0
+        self.lotes = 0
+
+    async def submit(self, paciente):
+        """
+        Enfileira um paciente e aguarda sua predição. Levanta Sobrecarga se a fila estiver cheia.
+        """
+        futuro = asyncio.get_running_loop().create_future()
+        try:
+            self.fila.put_nowait((paciente, futuro, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejeitadas += 1
+            raise Sobrecarga from None
+
+        self.requisicoes += 1
+        self.fila_pico = max(self.fila_pico, self.fila.qsize())
+        return await futuro
+
+    async def _coletar(self):
+        lote = [await self.fila.get()]
+        prazo = asyncio.get_running_loop().time() + self.janela
+
+        while len(lote) < self.tamanho_maximo:
+            if not self.fila.empty(): # O que já está na fila entra sem espera
+                lote.append(self.fila.get_nowait())
+                continue
+            restante = prazo - asyncio.get_running_loop().time()
+            if restante <= 0:
+                break
+            try:
+                lote.append(await asyncio.wait_for(self.fila.get(), restante))
+            except TimeoutError:
+                break
+        return lote
+
+    def _pontuar(self, pacientes):
+        return predict_risk(self.model, pd.DataFrame(pacientes, columns=FEATURES), LIMIAR_PADRAO, self.tracker, self.engine)
+
+    async def run(self):
+        """
+        Loop do consumidor: coleta um lote, pontua em uma thread e responde cada requisição.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = await self._coletar()
+            self.lotes += 1
+            agora = time.perf_counter()
+            for _, _, chegada in lote:
+                self.tracker.record('fila', (agora - chegada) * 1000)
+
+            pacientes = [paciente for paciente, _, _ in lote]
+            try:
+                predicoes = [await loop.run_in_executor(None, self._pontuar, pacientes)]
+                indices = [range(len(lote))]
+            except Exception:
+                # Um paciente inválido não derruba o lote: cada um é pontuado separadamente
+                predicoes, indices = [], []
+                for i, paciente in enumerate(pacientes):
+                    try:
+                        predicoes.append(await loop.run_in_executor(None, self._pontuar, [paciente]))
+                        indices.append([i])
+                    except Exception as e:
+                        if not lote[i][1].done(): # O cliente pode ter desconectado (futuro cancelado)
+                            lote[i][1].set_exception(ValueError(str(e)))
+
+            for predicao, posicoes in zip(predicoes, indices):
+                for j, i in enumerate(posicoes):
+                    futuro = lote[i][1]
+                    if not futuro.done():
+                        futuro.set_result((int(predicao.classe[j]), float(predicao.probabilidade[j])))
+
+    def metrics(self):
+        """
+        Profundidade da fila, tamanho médio dos lotes, rejeições e latências por etapa.
+        """
+        return {
+            'fila': {'atual': self.fila.qsize(), 'pico': self.fila_pico, 'limite': self.fila.maxsize},
+            'requisicoes': self.requisicoes,
+            'rejeitadas': self.rejeitadas,
+            'lotes': self.lotes,
+            'tamanho_medio_lote': round(self.requisicoes / self.lotes, 2) if self.lotes else 0.0,
+            'latencia_ms': self.tracker.summary()
+        }
+
+
+class InferenceService:
+    """
+    Servidor HTTP/1.1 mínimo (asyncio, conexões keep-alive) na frente do MicroBatcher.
+    Rotas: POST /predict (JSON com as 15 features), GET /metrics e GET /health.
+    """
+    def __init__(self, batcher, versao=None):
+        self.batcher = batcher
+        self.versao = versao
+        self.esquema = esquema_entrada(batcher.model.named_steps['preprocessor'])
+
+    async def _rotear(self, metodo, caminho, corpo):
+        if metodo == 'GET' and caminho == '/health':
+            return 200, {'status': 'ok', 'versao': self.versao}
+        if metodo == 'GET' and caminho == '/metrics':
+            return 200, {**self.batcher.metrics(), 'memoria': memoria_processo()}
+        if metodo != 'POST' or caminho != '/predict':
+            return 404, {'erro': f"Rota inexistente: {metodo} {caminho}"}
+
+        try:
+            paciente = json.loads(corpo)
+        except ValueError:
+            paciente = None
+        if not isinstance(paciente, dict):
+            return 400, {'erro': "Corpo da requisição deve ser um objeto JSON."}
+        erro = validar_paciente(paciente, self.esquema)
+        if erro:
+            return 400, {'erro': erro}
+
+        inicio = time.perf_counter()
+        try:
+            classe, probabilidade = await self.batcher.submit(paciente)
+        except Sobrecarga:
+            return 503, {'erro': "Fila de predições cheia, tente novamente."}
+        except ValueError as e:
+            return 400, {'erro': str(e)}
+        self.batcher.tracker.record('total', (time.perf_counter() - inicio) * 1000)
+
+        return 200, {'classe': classe, 'probabilidade': probabilidade, 'versao': self.versao}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                linha = await reader.readline()
+                if not linha:
+                    break
+                metodo, caminho, _ = linha.decode('latin-1').split(' ', 2)
+
+                cabecalhos = {}
+                while (linha := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    nome, _, valor = linha.decode('latin-1').partition(':')
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                tamanho = int(cabecalhos.get('content-length', 0))
+                if tamanho > CORPO_MAXIMO:
+                    # Recusa antes de ler; o corpo não lido impede reaproveitar a conexão
+                    writer.write(resposta_http(413, {'erro': f"Corpo acima de {CORPO_MAXIMO} bytes."}, False))
+                    await writer.drain()
+                    break
+                corpo = await reader.readexactly(tamanho)
+
+                status, resposta = await self._rotear(metodo, caminho, corpo)
+                manter = cabecalhos.get('connection', '').lower() != 'close'
+                writer.write(resposta_http(status, resposta, manter))
+                await writer.drain()
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=HOST_PADRAO, porta=PORTA_PADRAO, unix=None, **opcoes):
+        """
+        Inicia o consumidor dos lotes e aceita conexões TCP (host/porta) ou em um socket Unix.
+        """
+        consumidor = asyncio.create_task(self.batcher.run())
+        if unix:
+            servidor = await asyncio.start_unix_server(self.handle, path=unix, **opcoes)
+        else:
+            servidor = await asyncio.start_server(self.handle, host, porta, **opcoes)
+
+        async with servidor:
+            try:
+                await servidor.serve_forever()
+            finally:
+                consumidor.cancel()
+
+# ==========================================================================
+# Funções
+# ==========================================================================
+
+def esquema_entrada(preprocessor):
+    """
+    Valores aceitos em cada feature, a partir do pré-processamento treinado:
+    o conjunto de categorias do one-hot ou None para as colunas numéricas.
+    """
+    esquema = {col: None for col in FEATURES}
+    for _, transformador, colunas in preprocessor.transformers_:
+        if isinstance(transformador, OneHotEncoder):
+            for col, categorias in zip(colunas, transformador.categories_):
+                esquema[col] = set(categorias.tolist())
+    return esquema
+
+
+def validar_paciente(paciente, esquema):
+    """
+    Confere as 15 features antes de enfileirar o paciente: presença, números finitos
+    nas numéricas e categorias conhecidas pelo modelo. Retorna a mensagem de erro ou None.
+    """
+    faltantes = [col for col in FEATURES if col not in paciente]
+    if faltantes:
+        return f"Colunas obrigatórias ausentes: {', '.join(faltantes)}"
+
+    for col, categorias in esquema.items():
+        valor = paciente[col]
+        if categorias is None:
+            if isinstance(valor, bool) or not isinstance(valor, (int, float)) or not math.isfinite(valor):
+                return f"Valor inválido em '{col}': {valor!r} (esperado um número)"
+        elif isinstance(valor, (dict, list)) or valor not in categorias:
+            return f"Categoria desconhecida em '{col}': {valor!r}"
+    return None
+
+
+def resposta_http(status, corpo, manter=True):
+    """
+    Monta a resposta HTTP/1.1 com corpo JSON.
+    """
+    conteudo = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+    linhas = [
+        f"HTTP/1.1 {status} {STATUS_HTTP[status]}",
+        "Content-Type: application/json; charset=utf-8",
+        f"Content-Length: {len(conteudo)}",
+        f"Connection: {'keep-alive' if manter else 'close'}"
+    ]
+    if status == 503:
+        linhas.append("Retry-After: 1")
+    return ('\r\n'.join(linhas) + '\r\n\r\n').encode('latin-1') + conteudo
+
+
+def memoria_processo(pid=None):
+    """
+    Memória do processo em MB: RSS, USS (páginas exclusivas) e PSS (páginas
+    compartilhadas divididas entre os processos que as usam).
+    """
+    processo = psutil.Process(pid)
+    info = processo.memory_full_info()
+    return {
+        'pid': processo.pid,
+        'rss_mb': round(info.rss / 2**20, 1),
+        'uss_mb': round(info.uss / 2**20, 1),
+        'pss_mb': round(getattr(info, 'pss', info.rss) / 2**20, 1)
+    }
+
+
+def build_service(janela_ms=JANELA_MS, tamanho_lote=TAMANHO_LOTE, fila_maxima=FILA_MAXIMA, store=None,
+                  versao=None, compartilhado=False):
+    """
+    Carrega o modelo da versão ativa uma única vez e monta o serviço. Com compartilhado=True,
+    usa o pipeline enxuto (floresta compilada via mmap), próprio para vários processos.
+    """
+    store = store or ModelStore()
+    versao = versao or artifact_version(store)
+    if versao is not None and compartilhado:
+        batcher = MicroBatcher(load_serving_model(versao, store), None, janela_ms, tamanho_lote, fila_maxima)
+        return InferenceService(batcher, versao)
+
+    model = load_model(versao, store)
+    if model is None:
+        raise RuntimeError("Modelo indisponível: nenhuma versão local ou remota encontrada.")
+
+    try:
+        engine = load_forest(model, versao, store)
+    except TypeError: # Classificador sem floresta compilável: usa apenas o sklearn
+        engine = None
+
+    batcher = MicroBatcher(model, engine, janela_ms, tamanho_lote, fila_maxima)
+    return InferenceService(batcher, versao)
+
+
+def _paciente_exemplo(preprocessor):
+    """
+    Paciente válido montado a partir do pré-processamento, usado para aquecer o processo.
+    """
+    paciente = dict.fromkeys(FEATURES, 0)
+    for nome, transformador, colunas in preprocessor.transformers_:
+        if nome == 'cat':
+            paciente.update({col: categorias[0] for col, categorias in zip(colunas, transformador.categories_)})
+    return paciente
+
+
+def _worker(opcoes, versao, compartilhado, prontos):
+    """
+    Processo de serviço: carrega o modelo, aquece e aceita conexões na porta
+    compartilhada (SO_REUSEPORT, o kernel distribui as conexões).
+    """
+    servico = build_service(opcoes['janela_ms'], opcoes['lote'], opcoes['fila'], versao=versao, compartilhado=compartilhado)
+    modelo = servico.batcher.model
+    servico.batcher._pontuar([_paciente_exemplo(modelo.named_steps['preprocessor'])])
+    prontos.put(os.getpid())
+    asyncio.run(servico.serve(opcoes['host'], opcoes['porta'], reuse_port=True))
+
+
+def _imprimir_memoria(pids):
+    total = {'rss_mb': 0.0, 'uss_mb': 0.0, 'pss_mb': 0.0}
+    for pid in pids:
+        try:
+            memoria = memoria_processo(pid)
+        except psutil.NoSuchProcess:
+            continue
+        print(f"🧠 Processo {pid}: RSS {memoria['rss_mb']} MB | USS {memoria['uss_mb']} MB | PSS {memoria['pss_mb']} MB")
+        for chave in total:
+            total[chave] += memoria[chave]
+    print(f"🧠 Total: RSS {total['rss_mb']:.1f} MB | USS {total['uss_mb']:.1f} MB | PSS {total['pss_mb']:.1f} MB", flush=True)
+
+
+def serve_workers(opcoes, n_workers, compartilhado=True, store=None):
+    """
+    Inicia n_workers processos na mesma porta. No modo compartilhado, cada processo abre os
+    arrays da floresta via mmap (somente leitura), então a memória do modelo não se multiplica.
+    Reporta a memória de cada processo ao iniciar e ao encerrar.
+    """
+    store = store or ModelStore()
+    versao = artifact_version(store)
+    if versao is None:
+        raise RuntimeError("Modelo indisponível: nenhuma versão local ou remota encontrada.")
+    if compartilhado:
+        load_serving_model(versao, store) # Exporta os arquivos uma única vez, antes dos processos
+
+    contexto = multiprocessing.get_context('spawn')
+    prontos = contexto.Queue()
+    processos = [
+        contexto.Process(target=_worker, args=(opcoes, versao, compartilhado, prontos), daemon=True)
+        for _ in range(n_workers)
+    ]
+    for processo in processos:
+        processo.start()
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        pids = [prontos.get(timeout=TEMPO_INICIO) for _ in processos]
+        modo = 'floresta compartilhada (mmap)' if compartilhado else 'modelo completo por processo'
+        print(f"🚀 {n_workers} processos de inferência (modelo {versao[:12]}, {modo}) em http://{opcoes['host']}:{opcoes['porta']}", flush=True)
+        _imprimir_memoria(pids)
+        for processo in processos:
+            processo.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if 'pids' in locals():
+            _imprimir_memoria(pids)
+        for processo in processos:
+            processo.terminate()
+
+
+def main(): # Função principal
+    parser = argparse.ArgumentParser(description="Serviço local de inferência com micro-lotes (asyncio).")
+    parser.add_argument('--host', default=HOST_PADRAO, help="Endereço TCP.")
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO, help="Porta TCP.")
+    parser.add_argument('--unix', metavar='SOCKET', help="Escuta em um socket Unix em vez de TCP.")
+    parser.add_argument('--janela-ms', type=float, default=JANELA_MS, help="Espera máxima para formar um lote (ms).")
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help="Pacientes por lote (1 = sem micro-lotes).")
+    parser.add_argument('--fila', type=int, default=FILA_MAXIMA, help="Tamanho máximo da fila antes de responder 503.")
+    parser.add_argument('--workers', type=int, default=1, help="Processos atendendo na mesma porta (SO_REUSEPORT).")
+    parser.add_argument('--modelo-completo', action='store_true', help="Com vários processos, cada um carrega o pipeline completo do sklearn (comparação).")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        if args.unix:
+            parser.error("--workers > 1 requer TCP (SO_REUSEPORT não se aplica a sockets Unix).")
+        opcoes = {'host': args.host, 'porta': args.porta, 'janela_ms': args.janela_ms, 'lote': args.lote, 'fila': args.fila}
+        serve_workers(opcoes, args.workers, compartilhado=not args.modelo_completo)
+        return
+
+    servico = build_service(args.janela_ms, args.lote, args.fila)
+    endereco = args.unix or f"http://{args.host}:{args.porta}"
+    print(f"🚀 Serviço de inferência (modelo {servico.versao[:12]}) em {endereco}", flush=True)
+    asyncio.run(servico.serve(args.host, args.porta, args.unix))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import pandas as pd
+
+from dashboard_data import COLS_FILTRO
+
+# ==========================================================================
+# Constantes
+# ==========================================================================
+# Dimensões do cubo: filtros, idade (filtro de faixa) e colunas exibidas nos gráficos.
+# Os rótulos e a faixa etária dependem de outras dimensões e não aumentam o número de células.
+DIMENSOES_CUBO = COLS_FILTRO + ['idade', 'categoria', 'hist_label', 'fuma_label', 'monit_label', 'faixa_etaria']
+MEDIDAS = ['n', 'soma_imc', 'soma_idade', 'n_obesos']
+# Medidas do risco previsto pelo modelo, presentes quando a base já foi pontuada (risk_scores.py)
+MEDIDAS_RISCO = ['soma_risco', 'n_risco']
+
+# ==========================================================================
+# Funções
+# ==========================================================================
+
+def build_cube(df, dimensoes=DIMENSOES_CUBO):
+    """
+    Agrega os pacientes em uma célula por combinação das dimensões, guardando
+    quantidade, soma do IMC, soma da idade e quantidade de obesos.
+    Se a base tiver as colunas de risco previsto, guarda também a soma das
+    probabilidades e a quantidade classificada em risco, por faixa de risco.
+    As células seguem a ordem da primeira ocorrência de cada combinação na base.
+    """
+    medidas = pd.DataFrame({
+        'n': 1, 'soma_imc': df['imc'], 'soma_idade': df['idade'], 'n_obesos': df['is_obese'].astype('int64')
+    }, index=df.index)
+    if 'risk_proba' in df.columns:
+        dimensoes = dimensoes + ['faixa_risco']
+        medidas['soma_risco'] = df['risk_proba']
+        medidas['n_risco'] = df['risk_class'].astype('int64')
+
+    cubo = pd.concat([df[dimensoes], medidas], axis=1)
+    # dropna=False mantém os pacientes sem categoria clínica, como no df original
+    return cubo.groupby(dimensoes, observed=True, dropna=False, sort=False)[_medidas(medidas)].sum().reset_index()
+
+
+def _medidas(cubo):
+    """
+    Medidas disponíveis no cubo (as de risco só existem com a base pontuada).
+    """
+    return MEDIDAS + [m for m in MEDIDAS_RISCO if m in cubo.columns]
+
+
+def totals(cubo):
+    """
+    Indicadores gerais (big numbers) das células selecionadas.
+    """
+    soma = cubo[_medidas(cubo)].sum()
+    kpis = {
+        'pacientes': int(soma['n']),
+        'imc_medio': soma['soma_imc'] / soma['n'],
+        'taxa_obesidade': soma['n_obesos'] / soma['n'],
+        'idade_media': soma['soma_idade'] / soma['n']
+    }
+    if 'soma_risco' in soma:
+        kpis['risco_medio'] = soma['soma_risco'] / soma['n']
+        kpis['taxa_risco'] = soma['n_risco'] / soma['n']
+    return kpis
+
+
+def rollup(cubo, dimensao, sort=True):
+    """
+    Consolida as células por uma dimensão: quantidade, IMC médio e taxa de obesidade
+    (e risco médio previsto e taxa classificada em risco, quando disponíveis).
+    Com sort=False, os grupos seguem a ordem de primeira ocorrência (como Series.unique).
+    """
+    resumo = cubo.groupby(dimensao, observed=True, sort=sort)[_medidas(cubo)].sum()
+    resumo['imc'] = resumo['soma_imc'] / resumo['n']
+    resumo['is_obese'] = resumo['n_obesos'] / resumo['n']
+    if 'soma_risco' in resumo.columns:
+        resumo['risk_proba'] = resumo['soma_risco'] / resumo['n']
+        resumo['risk_class'] = resumo['n_risco'] / resumo['n']
+    return resumo.reset_index()
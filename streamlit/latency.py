@@ -0,0 +1,75 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# ==========================================================================
+# Constantes
+# ==========================================================================
+JANELA_PADRAO = 1000 # Quantidade de medições mais recentes mantidas por etapa
+PERCENTIS = (50, 95, 99)
+
+# ==========================================================================
+# Classes
+# ==========================================================================
+
+class LatencyTracker:
+    """
+    Registra a duração (ms) de cada etapa da predição em janelas móveis
+    e calcula os percentis p50/p95/p99 por etapa.
+    """
+    def __init__(self, janela=JANELA_PADRAO):
+        self.janela = janela
+        self._amostras = defaultdict(lambda: deque(maxlen=self.janela))
+        self._lock = threading.Lock() # O mesmo rastreador é compartilhado entre sessões
+
+    @contextmanager
+    def stage(self, nome):
+        """
+        Mede o tempo gasto dentro do bloco 'with' e registra na etapa informada.
+        """
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(nome, (time.perf_counter() - inicio) * 1000)
+
+    def record(self, nome, duracao_ms):
+        with self._lock:
+            self._amostras[nome].append(duracao_ms)
+
+    def summary(self):
+        """
+        Retorna um dicionário {etapa: {'n', 'p50', 'p95', 'p99'}} com as latências em ms.
+        """
+        with self._lock:
+            amostras = {nome: np.fromiter(valores, dtype=float) for nome, valores in self._amostras.items()}
+
+        resumo = {}
+        for nome, valores in amostras.items():
+            if valores.size == 0:
+                continue
+            resumo[nome] = {'n': int(valores.size)}
+            for p, valor in zip(PERCENTIS, np.percentile(valores, PERCENTIS)):
+                resumo[nome][f'p{p}'] = round(float(valor), 3)
+        return resumo
+
+    def dump(self, caminho=None):
+        """
+        Exporta o resumo em JSON (string ou arquivo) para consulta dos operadores.
+        """
+        conteudo = json.dumps(self.summary(), indent=2, ensure_ascii=False)
+        if caminho is not None:
+            with open(caminho, 'w', encoding='utf-8') as f:
+                f.write(conteudo)
+        return conteudo
+
+    def reset(self):
+        with self._lock:
+            self._amostras.clear()
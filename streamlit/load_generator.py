@@ -0,0 +1,126 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import argparse
+import asyncio
+import json
+import time
+
+import pandas as pd
+
+from etl import DATA_PATH
+from inference_service import HOST_PADRAO, PORTA_PADRAO
+from latency import LatencyTracker
+from model_utils import FEATURES
+
+# ==========================================================================
+# Constantes
+# ==========================================================================
+CONEXOES_PADRAO = 64
+REQUISICOES_PADRAO = 5_000
+
+# ==========================================================================
+# Funções
+# ==========================================================================
+
+def montar_requisicao(metodo, caminho, corpo=b''):
+    return (
+        f"{metodo} {caminho} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(corpo)}\r\n\r\n"
+    ).encode('latin-1') + corpo
+
+
+async def _ler_resposta(reader):
+    status = int((await reader.readline()).split()[1])
+    tamanho = 0
+    while (linha := await reader.readline()) not in (b'\r\n', b''):
+        nome, _, valor = linha.decode('latin-1').partition(':')
+        if nome.strip().lower() == 'content-length':
+            tamanho = int(valor)
+    return status, await reader.readexactly(tamanho)
+
+
+async def _conectar(host, porta, unix):
+    if unix:
+        return await asyncio.open_unix_connection(unix)
+    return await asyncio.open_connection(host, porta)
+
+
+async def _cliente(host, porta, unix, corpos, tracker, contagem):
+    """
+    Uma conexão keep-alive enviando as requisições em sequência (uma por vez).
+    """
+    reader, writer = await _conectar(host, porta, unix)
+    try:
+        for corpo in corpos:
+            inicio = time.perf_counter()
+            writer.write(montar_requisicao('POST', '/predict', corpo))
+            await writer.drain()
+            status, _ = await _ler_resposta(reader)
+            tracker.record('requisicao', (time.perf_counter() - inicio) * 1000)
+            contagem[status] = contagem.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def fetch_metrics(host=HOST_PADRAO, porta=PORTA_PADRAO, unix=None):
+    """
+    Consulta o GET /metrics do serviço.
+    """
+    reader, writer = await _conectar(host, porta, unix)
+    writer.write(montar_requisicao('GET', '/metrics'))
+    await writer.drain()
+    _, corpo = await _ler_resposta(reader)
+    writer.close()
+    return json.loads(corpo)
+
+
+async def run_load(pacientes, host=HOST_PADRAO, porta=PORTA_PADRAO, unix=None,
+                   conexoes=CONEXOES_PADRAO, requisicoes=REQUISICOES_PADRAO):
+    """
+    Dispara as requisições a partir de várias conexões concorrentes e
+    mede vazão (req/s) e latência percebida pelo cliente.
+    """
+    corpos = [json.dumps(pacientes[i % len(pacientes)]).encode('utf-8') for i in range(requisicoes)]
+    tracker = LatencyTracker(janela=requisicoes)
+    contagem = {}
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(
+        _cliente(host, porta, unix, corpos[i::conexoes], tracker, contagem) for i in range(conexoes)
+    ))
+    duracao = time.perf_counter() - inicio
+
+    return {
+        'requisicoes': requisicoes,
+        'status': contagem,
+        'duracao_s': round(duracao, 3),
+        'req_por_s': round(requisicoes / duracao, 1),
+        'latencia_ms': tracker.summary().get('requisicao', {})
+    }
+
+
+def main(): # Função principal
+    parser = argparse.ArgumentParser(description="Gerador de carga para o serviço de inferência.")
+    parser.add_argument('--host', default=HOST_PADRAO, help="Endereço TCP do serviço.")
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO, help="Porta TCP do serviço.")
+    parser.add_argument('--unix', metavar='SOCKET', help="Socket Unix do serviço.")
+    parser.add_argument('--base', default=DATA_PATH, help="Pacientes usados nas requisições (df_base.csv).")
+    parser.add_argument('--conexoes', type=int, default=CONEXOES_PADRAO, help="Clientes concorrentes.")
+    parser.add_argument('--requisicoes', type=int, default=REQUISICOES_PADRAO, help="Total de requisições.")
+    args = parser.parse_args()
+
+    pacientes = pd.read_csv(args.base, encoding='utf-8-sig')[FEATURES].to_dict('records')
+    resultado = asyncio.run(run_load(pacientes, args.host, args.porta, args.unix, args.conexoes, args.requisicoes))
+    metricas = asyncio.run(fetch_metrics(args.host, args.porta, args.unix))
+
+    print("-" * 30)
+    print(f"📨 Requisições: {resultado['requisicoes']} ({args.conexoes} conexões) | status: {resultado['status']}")
+    print(f"⏱️ Vazão: {resultado['req_por_s']} req/s em {resultado['duracao_s']}s")
+    print(f"📈 Latência (ms): {resultado['latencia_ms']}")
+    print(f"📦 Tamanho médio do lote: {metricas['tamanho_medio_lote']} | pico da fila: {metricas['fila']['pico']} | rejeitadas: {metricas['rejeitadas']}")
+    print("-" * 30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import argparse
+import copy
+import io
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.metrics import f1_score, recall_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.tree import DecisionTreeClassifier
+
+from etl import DATA_PATH
+from latency import LatencyTracker
+from model_comparison import RANDOM_STATE, TEST_SIZE, load_base
+from model_utils import MODEL_PATH, load_cli_model
+
+# ==========================================================================
+# Constantes
+# ==========================================================================
+TOLERANCIA_RECALL = 0.005 # Perda máxima de recall aceita em relação ao modelo original
+ARVORES_TOP_K = (10, 25, 50)
+PROFUNDIDADES = (6, 8, 10)
+AMOSTRAS_SINTETICAS = 20_000 # Pacientes sintéticos rotulados pelo modelo original na destilação
+TAMANHO_VALIDACAO = 0.2 # Parte do treino separada para escolher a variante (o teste só é usado no relatório)
+REPETICOES_LATENCIA = 500 # Pacientes cronometrados por variante
+TOLERANCIA_LATENCIA = 0.10 # Diferença relativa de p99 tratada como empate (desempate pelo F1 e pelos bytes)
+
+# ==========================================================================
+# Funções
+# ==========================================================================
+
+def _com_classificador(model, classifier):
+    """
+    Monta um pipeline servível com o pré-processamento já ajustado do modelo original.
+    """
+    return Pipeline(steps=[('preprocessor', model.named_steps['preprocessor']), ('classifier', classifier)])
+
+
+def _probas_oob(forest, X):
+    """
+    Probabilidade de risco de cada árvore em cada paciente e a máscara out-of-bag
+    (pacientes fora da amostra bootstrap da árvore).
+    """
+    probas = np.stack([arvore.predict_proba(X)[:, 1] for arvore in forest.estimators_])
+    oob = np.ones(probas.shape, dtype=bool)
+    for t, amostras in enumerate(forest.estimators_samples_):
+        oob[t, amostras] = False
+    return probas, oob
+
+
+def selecionar_arvores(forest, X, y, k):
+    """
+    Seleção gulosa das k árvores que mais reduzem o erro quadrático (Brier) da
+    floresta nos pacientes out-of-bag, sem usar a base de teste. X e y devem ser
+    a base em que a floresta foi treinada (split de treino do notebook).
+    """
+    probas, oob = _probas_oob(forest, X)
+    alvo = np.asarray(y, dtype=float)
+    prior = alvo.mean()
+
+    soma = np.zeros(len(alvo))
+    votos = np.zeros(len(alvo))
+    escolhidas = []
+    disponiveis = np.ones(len(probas), dtype=bool)
+
+    for _ in range(min(k, len(probas))):
+        # Erro do ensemble ao acrescentar cada árvore candidata (uma linha por árvore)
+        novos_votos = votos + oob
+        media = np.divide(soma + probas * oob, novos_votos, out=np.full(probas.shape, prior), where=novos_votos > 0)
+        erro = ((media - alvo) ** 2).mean(axis=1)
+        erro[~disponiveis] = np.inf
+
+        melhor = int(np.argmin(erro))
+        escolhidas.append(melhor)
+        disponiveis[melhor] = False
+        soma += probas[melhor] * oob[melhor]
+        votos += oob[melhor]
+
+    return escolhidas
+
+
+def forest_top_k(forest, escolhidas):
+    """
+    Cópia rasa da floresta contendo apenas as árvores escolhidas.
+    """
+    reduzida = copy.copy(forest)
+    reduzida.estimators_ = [forest.estimators_[i] for i in escolhidas]
+    reduzida.n_estimators = len(escolhidas)
+    return reduzida
+
+
+def dados_destilacao(X, n_amostras=AMOSTRAS_SINTETICAS, semente=RANDOM_STATE):
+    """
+    Base de destilação: os pacientes reais mais pacientes sintéticos, sorteando cada
+    coluna de forma independente, para cobrir combinações ausentes na base.
+    """
+    rng = np.random.default_rng(semente)
+    sinteticos = pd.DataFrame({col: rng.choice(X[col].to_numpy(), n_amostras) for col in X.columns})
+    return pd.concat([X, sinteticos], ignore_index=True)
+
+
+def build_variants(model, X_train, y_train, arvores_top_k=ARVORES_TOP_K, profundidades=PROFUNDIDADES):
+    """
+    Gera as variantes compactas do pipeline treinado:
+    - top-k: k árvores da própria floresta escolhidas pela contribuição out-of-bag;
+    - profundidade: floresta com os mesmos parâmetros, retreinada com max_depth limitado;
+    - destilação: uma árvore e um GBM pequeno treinados nos rótulos do modelo original.
+    """
+    forest = model.named_steps['classifier']
+    if not hasattr(forest, 'estimators_samples_'):
+        raise TypeError("Apenas pipelines com RandomForestClassifier treinado (com bootstrap) são suportados.")
+    Xt = model.named_steps['preprocessor'].transform(X_train)
+    variantes = {'original': model}
+
+    ordem = selecionar_arvores(forest, Xt, y_train, max(arvores_top_k))
+    for k in arvores_top_k:
+        variantes[f'top_{k}_arvores'] = _com_classificador(model, forest_top_k(forest, ordem[:k]))
+
+    for profundidade in profundidades:
+        rasa = clone(forest).set_params(max_depth=profundidade)
+        variantes[f'profundidade_{profundidade}'] = _com_classificador(model, rasa.fit(Xt, y_train))
+
+    X_destilacao = dados_destilacao(X_train)
+    y_professor = model.predict(X_destilacao)
+    Xd = model.named_steps['preprocessor'].transform(X_destilacao)
+    for profundidade in (6, 8):
+        arvore = DecisionTreeClassifier(max_depth=profundidade, random_state=RANDOM_STATE)
+        variantes[f'arvore_destilada_{profundidade}'] = _com_classificador(model, arvore.fit(Xd, y_professor))
+    gbm = GradientBoostingClassifier(n_estimators=50, max_depth=3, random_state=RANDOM_STATE)
+    variantes['gbm_destilado'] = _com_classificador(model, gbm.fit(Xd, y_professor))
+
+    return variantes
+
+
+def _tamanho_e_carga(pipe, repeticoes=5):
+    """
+    Bytes do artefato joblib e tempo mediano (ms) do joblib.load.
+    """
+    buffer = io.BytesIO()
+    joblib.dump(pipe, buffer)
+    tempos = []
+    for _ in range(repeticoes):
+        buffer.seek(0)
+        inicio = time.perf_counter()
+        joblib.load(buffer)
+        tempos.append(time.perf_counter() - inicio)
+    return buffer.getbuffer().nbytes, float(np.median(tempos)) * 1000
+
+
+def compaction_report(variantes, X_test, y_test, repeticoes=REPETICOES_LATENCIA):
+    """
+    Compara as variantes em uma base de avaliação: recall/F1 (e a diferença para o original),
+    bytes do artefato, tempo de carga e latência p50/p99 de um paciente por vez. As variantes
+    são cronometradas intercaladas, para que oscilações da máquina afetem todas igualmente.
+    """
+    tracker = LatencyTracker(janela=repeticoes)
+    for i in range(repeticoes):
+        paciente = X_test.iloc[[i % len(X_test)]]
+        for nome, pipe in variantes.items():
+            with tracker.stage(nome):
+                pipe.predict_proba(paciente)
+
+    linhas = []
+    for nome, pipe in variantes.items():
+        y_pred = pipe.predict(X_test)
+        tamanho, carga_ms = _tamanho_e_carga(pipe)
+        linhas.append({
+            'variante': nome,
+            'recall': recall_score(y_test, y_pred),
+            'f1': f1_score(y_test, y_pred),
+            'bytes': tamanho,
+            'carga_ms': carga_ms,
+            'p50_ms': tracker.summary()[nome]['p50'],
+            'p99_ms': tracker.summary()[nome]['p99']
+        })
+
+    relatorio = pd.DataFrame(linhas).set_index('variante')
+    relatorio.insert(1, 'delta_recall', relatorio['recall'] - relatorio.loc['original', 'recall'])
+    relatorio.insert(3, 'delta_f1', relatorio['f1'] - relatorio.loc['original', 'f1'])
+    return relatorio
+
+
+def choose_variant(relatorio, tolerancia=TOLERANCIA_RECALL, tolerancia_latencia=TOLERANCIA_LATENCIA):
+    """
+    Variante mais barata cuja perda de recall cabe na tolerância: entre as aceitas, as de
+    p99 até tolerancia_latencia acima do menor são tratadas como empate, decidido pelo
+    maior F1 e, por fim, pelos bytes do artefato.
+    """
+    aceitas = relatorio[relatorio['delta_recall'] >= -tolerancia]
+    empatadas = aceitas[aceitas['p99_ms'] <= aceitas['p99_ms'].min() * (1 + tolerancia_latencia)]
+    return empatadas.sort_values(['f1', 'bytes'], ascending=[False, True]).index[0]
+
+
+def select_variant(model, X_train, y_train, tolerancia=TOLERANCIA_RECALL):
+    """
+    Escolhe a variante sem olhar o teste: separa uma validação do treino, retreina o
+    pipeline original (mesmos parâmetros) no restante, gera as variantes a partir dele
+    e compara na validação. Retorna o nome escolhido e o relatório da validação.
+    """
+    X_ajuste, X_val, y_ajuste, y_val = train_test_split(
+        X_train, y_train, test_size=TAMANHO_VALIDACAO, random_state=RANDOM_STATE, stratify=y_train
+    )
+    referencia = clone(model).fit(X_ajuste, y_ajuste)
+    relatorio = compaction_report(build_variants(referencia, X_ajuste, y_ajuste), X_val, y_val)
+    return choose_variant(relatorio, tolerancia), relatorio
+
+
+def main(): # Função principal
+    parser = argparse.ArgumentParser(description="Gera e compara variantes compactas do modelo para servir.")
+    parser.add_argument('--base', default=DATA_PATH, help="Base tratada (df_base.csv) usada no treino do modelo.")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_RECALL, help="Perda máxima de recall aceita.")
+    parser.add_argument('--modelo', default=MODEL_PATH, help="Pipeline treinado (.joblib).")
+    parser.add_argument('--salvar', metavar='JOBLIB', help="Grava a variante escolhida.")
+    args = parser.parse_args()
+
+    model = load_cli_model(args.modelo)
+
+    X, y = load_base(args.base)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=y)
+
+    escolhida, validacao = select_variant(model, X_train, y_train, args.tolerancia)
+    variantes = build_variants(model, X_train, y_train)
+    relatorio = compaction_report(variantes, X_test, y_test)
+
+    pd.set_option('display.width', 200)
+    print("\nVARIANTES COMPACTAS (validação separada do treino, usada na escolha):")
+    print(validacao.round(4).to_string())
+    print("\nVARIANTES COMPACTAS (teste do notebook):")
+    print(relatorio.round(4).to_string())
+    print("-" * 30)
+    print(f"🏆 Mais barata dentro da tolerância de recall ({args.tolerancia}), escolhida na validação: {escolhida}")
+    print(f"📊 No teste: recall {relatorio.loc[escolhida, 'recall']:.4f} ({relatorio.loc[escolhida, 'delta_recall']:+.4f}) | F1 {relatorio.loc[escolhida, 'f1']:.4f} ({relatorio.loc[escolhida, 'delta_f1']:+.4f})")
+    if args.salvar:
+        joblib.dump(variantes[escolhida], args.salvar)
+        print(f"📄 Arquivo: {args.salvar}")
+    print("-" * 30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import argparse
+import hashlib
+import json
+import time
+from collections import namedtuple
+
+import pandas as pd
+import xgboost as xgb
+from joblib import Memory, Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.pipeline import Pipeline
+
+from etl import DATA_PATH
+from model_utils import FEATURES_CAT, FEATURES_NUM, TARGET, build_preprocessor
+
+# ==========================================================================
+# Constantes
+# ==========================================================================
+CACHE_PATH = 'models/cache' # Pipelines e métricas já calculados (joblib.Memory)
+RANDOM_STATE = 123
+TEST_SIZE = 0.2
+N_FOLDS = 5
+# Parâmetros que não alteram o modelo treinado e, por isso, ficam fora da chave do cache
+PARAMS_IGNORADOS = {'n_jobs', 'nthread', 'verbose', 'verbosity'}
+
+# Resultado da comparação: ranking, pipelines treinados e o uso do cache
+Comparacao = namedtuple('Comparacao', ['ranking', 'pipelines', 'cache'])
+
+# ==========================================================================
+# Funções
+# ==========================================================================
+
+def candidatos_padrao():
+    """
+    Modelos comparados no notebook. Cada modelo usa uma thread: o paralelismo
+    fica na distribuição dos ajustes (modelo x fold) entre os núcleos.
+    """
+    return {
+        "Logistic Regression": LogisticRegression(random_state=RANDOM_STATE, max_iter=1000),
+        "Random Forest": RandomForestClassifier(n_estimators=200, random_state=RANDOM_STATE, n_jobs=1),
+        "XGBoost": xgb.XGBClassifier(eval_metric='logloss', random_state=RANDOM_STATE, n_jobs=1)
+    }
+
+
+def data_hash(X, y):
+    """
+    Hash do conteúdo (colunas, valores e ordem das linhas) de X e y.
+    """
+    h = hashlib.sha256(json.dumps([list(X.columns), y.name]).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    h.update(pd.util.hash_pandas_object(y, index=False).values.tobytes())
+    return h.hexdigest()[:16]
+
+
+def estimator_key(estimador):
+    """
+    Identifica o estimador pela classe e pelos hiperparâmetros que afetam o ajuste.
+    """
+    params = {
+        nome: valor for nome, valor in estimador.get_params(deep=False).items()
+        if nome not in PARAMS_IGNORADOS
+    }
+    return {'classe': f"{type(estimador).__module__}.{type(estimador).__qualname__}", 'params': params}
+
+
+def _metricas(pipe, X, y):
+    y_pred = pipe.predict(X)
+    y_proba = pipe.predict_proba(X)[:, 1]
+    return {
+        "Acurácia": accuracy_score(y, y_pred),
+        "Precisão": precision_score(y, y_pred),
+        "Recall": recall_score(y, y_pred),
+        "F1-score": f1_score(y, y_pred),
+        "AUC-ROC": roc_auc_score(y, y_proba)
+    }
+
+
+def _ajustar(hash_dados, chave, parte, acuracia_treino, estimador, X_treino, y_treino, X_avaliacao, y_avaliacao):
+    """
+    Ajusta o pipeline em uma parte da base (fold da validação cruzada ou split final).
+    Os dados e o estimador entram no cache apenas pela chave (hash da base, parâmetros, parte).
+    Com acuracia_treino, os folds também pontuam o próprio treino (gap de overfitting);
+    no split final, o pipeline treinado também é guardado.
+    """
+    pipe = Pipeline(steps=[('preprocessor', build_preprocessor()), ('classifier', clone(estimador))])
+    pipe.fit(X_treino, y_treino)
+
+    metricas = _metricas(pipe, X_avaliacao, y_avaliacao)
+    if parte[0] == 'holdout':
+        return metricas, pipe
+
+    if acuracia_treino:
+        metricas['Acurácia treino'] = accuracy_score(y_treino, pipe.predict(X_treino))
+    return metricas, None
+
+
+def comparar_modelos(X, y, candidatos=None, n_folds=N_FOLDS, n_jobs=-1, cache=CACHE_PATH, acuracia_treino=False):
+    """
+    Versão paralela e memorizada do treinar_e_avaliar_modelos do notebook.
+    Cada (modelo, fold) e o ajuste final no split de treino/teste são tarefas
+    independentes, distribuídas entre os núcleos. Só são executadas as tarefas
+    ainda ausentes do cache: ao mudar um hiperparâmetro, apenas aquele modelo é refeito.
+    A coluna de overfitting é opcional (acuracia_treino=True), pois exige pontuar o
+    treino de cada fold. Ela segue a definição da validação cruzada (acurácia média no
+    treino dos folds menos a acurácia média na validação), e não mais o gap treino x teste
+    do split final usado no notebook.
+    """
+    candidatos = candidatos or candidatos_padrao()
+    ajustar = Memory(cache, verbose=0).cache(
+        _ajustar, ignore=['estimador', 'X_treino', 'y_treino', 'X_avaliacao', 'y_avaliacao']
+    )
+
+    hash_dados = data_hash(X, y)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=y
+    )
+    folds = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=RANDOM_STATE)
+
+    # Tarefas: (nome, parte, dados de treino e avaliação)
+    tarefas = []
+    for nome in candidatos:
+        tarefas.append((nome, ('holdout', TEST_SIZE, RANDOM_STATE), X_train, y_train, X_test, y_test))
+        for i, (treino, validacao) in enumerate(folds.split(X_train, y_train)):
+            tarefas.append((
+                nome, ('cv', n_folds, RANDOM_STATE, i),
+                X_train.iloc[treino], y_train.iloc[treino], X_train.iloc[validacao], y_train.iloc[validacao]
+            ))
+
+    chaves = {nome: estimator_key(estimador) for nome, estimador in candidatos.items()}
+    # A acurácia de treino só muda a chave dos folds (o split final nunca a calcula)
+    treino = {parte: acuracia_treino and parte[0] == 'cv' for _, parte, *_ in tarefas}
+    pendentes = [
+        t for t in tarefas
+        if not ajustar.check_call_in_cache(hash_dados, chaves[t[0]], t[1], treino[t[1]], None, None, None, None, None)
+    ]
+
+    Parallel(n_jobs=n_jobs)(
+        delayed(ajustar)(hash_dados, chaves[nome], parte, treino[parte], candidatos[nome], *dados)
+        for nome, parte, *dados in pendentes
+    )
+    # Com tudo em cache, os resultados são lidos no processo principal
+    resultados = [
+        (nome, parte, *ajustar(hash_dados, chaves[nome], parte, treino[parte], candidatos[nome], *dados))
+        for nome, parte, *dados in tarefas
+    ]
+
+    resultados_lista = []
+    pipes = {}
+    for nome in candidatos:
+        final = next(r for r in resultados if r[0] == nome and r[1][0] == 'holdout')
+        cv = pd.DataFrame([r[2] for r in resultados if r[0] == nome and r[1][0] == 'cv'])
+        pipes[nome] = final[3]
+
+        linha = {
+            "Modelo": nome,
+            **final[2],
+            "AUC-ROC (CV)": f"{cv['AUC-ROC'].mean():.4f} ± {cv['AUC-ROC'].std():.4f}"
+        }
+        if acuracia_treino:
+            linha["Overfit CV (%)"] = f"{(cv['Acurácia treino'] - cv['Acurácia']).mean() * 100:.2f}%"
+        resultados_lista.append(linha)
+
+    df_ranking = pd.DataFrame(resultados_lista).sort_values(by="AUC-ROC", ascending=False)
+    uso_cache = {
+        'tarefas': len(tarefas),
+        'ajustadas': len(pendentes),
+        'modelos_refeitos': sorted({t[0] for t in pendentes})
+    }
+    return Comparacao(df_ranking, pipes, uso_cache)
+
+
+def load_base(caminho=DATA_PATH):
+    """
+    Lê o df_base.csv e separa as features do modelo e o alvo (tendencia_obesidade).
+    """
+    df = pd.read_csv(caminho, encoding='utf-8-sig')
+    return df[FEATURES_NUM + FEATURES_CAT], df[TARGET]
+
+
+def _valor(texto):
+    try:
+        return json.loads(texto)
+    except ValueError:
+        return texto
+
+
+def main(): # Função principal
+    parser = argparse.ArgumentParser(description="Compara os modelos candidatos em paralelo, com validação cruzada e cache.")
+    parser.add_argument('--base', default=DATA_PATH, help="Base tratada (df_base.csv).")
+    parser.add_argument('--folds', type=int, default=N_FOLDS, help="Folds da validação cruzada estratificada.")
+    parser.add_argument('--jobs', type=int, default=-1, help="Processos usados nos ajustes (-1 = todos os núcleos).")
+    parser.add_argument('--cache', default=CACHE_PATH, help="Pasta do cache de pipelines e métricas.")
+    parser.add_argument('--param', action='append', default=[], metavar='MODELO:PARAM=VALOR',
+                        help="Altera um hiperparâmetro, ex: 'Random Forest:max_depth=10'.")
+    parser.add_argument('--overfit', action='store_true',
+                        help="Pontua também o treino de cada fold e exibe o gap de overfitting da validação cruzada.")
+    args = parser.parse_args()
+
+    candidatos = candidatos_padrao()
+    for item in args.param:
+        nome, atribuicao = item.split(':', 1)
+        param, valor = atribuicao.split('=', 1)
+        candidatos[nome].set_params(**{param: _valor(valor)})
+
+    X, y = load_base(args.base)
+    inicio = time.perf_counter()
+    comparacao = comparar_modelos(X, y, candidatos, n_folds=args.folds, n_jobs=args.jobs, cache=args.cache, acuracia_treino=args.overfit)
+    duracao = time.perf_counter() - inicio
+
+    print("\nRANKING FINAL DE MODELOS:")
+    print(comparacao.ranking.to_string(index=False))
+    print("-" * 30)
+    print(f"⏱️ Tempo total: {duracao:.1f}s")
+    print(f"🧮 Ajustes executados: {comparacao.cache['ajustadas']} de {comparacao.cache['tarefas']}")
+    print(f"🔁 Modelos refeitos: {', '.join(comparacao.cache['modelos_refeitos']) or 'nenhum (tudo em cache)'}")
+    print("-" * 30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import argparse
+import time
+import warnings
+from collections import namedtuple
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import f1_score, fbeta_score, precision_score, recall_score
+from sklearn.model_selection import ParameterSampler, train_test_split
+from sklearn.pipeline import Pipeline
+
+from etl import DATA_PATH
+from model_comparison import RANDOM_STATE, TEST_SIZE, load_base
+from model_utils import build_preprocessor
+
+# ==========================================================================
+# Constantes
+# ==========================================================================
+ORCAMENTO_PADRAO = 120 # Tempo máximo da busca, em segundos
+FATOR = 3 # A cada rodada, só 1/FATOR dos candidatos segue para a próxima
+FRACAO_VALIDACAO = 0.25 # Parte do treino reservada para comparar os candidatos
+BETA = 2 # F-beta com beta=2: o recall pesa mais que a precisão (evitar falsos negativos)
+
+# Rodadas (fração da base de treino, número de árvores). Enquanto a fração não muda,
+# as árvores novas são acrescentadas ao modelo da rodada anterior (warm start).
+RODADAS = [(1 / 3, 50), (1.0, 50), (1.0, 100), (1.0, 200)]
+
+# Espaço de busca de cada família, sobre o classifier do Pipeline do notebook
+ESPACO = {
+    'Random Forest': {
+        'max_depth': [None, 8, 12, 16],
+        'min_samples_leaf': [1, 2, 4],
+        'max_features': ['sqrt', 0.5, None],
+        'class_weight': [None, 'balanced']
+    },
+    'XGBoost': {
+        'max_depth': [3, 4, 6],
+        'learning_rate': [0.05, 0.1, 0.3],
+        'subsample': [0.8, 1.0],
+        'min_child_weight': [1, 3]
+    }
+}
+
+# Resultado da busca: pipeline vencedor (não treinado, com a configuração avaliada), todas as avaliações,
+# fronteira de Pareto e controle do orçamento
+Busca = namedtuple('Busca', ['melhor', 'avaliacoes', 'pareto', 'duracao', 'interrompida'])
+
+# ==========================================================================
+# Funções
+# ==========================================================================
+
+def _classificador(familia, params):
+    if familia == 'Random Forest':
+        return RandomForestClassifier(random_state=RANDOM_STATE, warm_start=True, n_jobs=-1, **params)
+    return xgb.XGBClassifier(eval_metric='logloss', random_state=RANDOM_STATE, n_jobs=-1, **params)
+
+
+def montar_pipeline(familia, params, n_arvores=None):
+    """
+    Pipeline do notebook com o classificador da família; com n_arvores, sem warm start
+    (configuração final, pronta para ser treinada do zero).
+    """
+    classifier = _classificador(familia, params)
+    if n_arvores is not None:
+        classifier.set_params(n_estimators=n_arvores)
+        if isinstance(classifier, RandomForestClassifier):
+            classifier.set_params(warm_start=False)
+    return Pipeline(steps=[('preprocessor', build_preprocessor()), ('classifier', classifier)])
+
+
+def gerar_candidatos(n_candidatos=27, semente=RANDOM_STATE):
+    """
+    Sorteia as configurações, dividindo os candidatos entre as famílias (2/3 Random Forest).
+    """
+    n_rf = int(round(n_candidatos * 2 / 3))
+    candidatos = []
+    for familia, n in (('Random Forest', n_rf), ('XGBoost', n_candidatos - n_rf)):
+        for params in ParameterSampler(ESPACO[familia], n, random_state=semente):
+            candidatos.append((familia, params))
+    return candidatos
+
+
+def crescer(pipe, n_arvores, X, y):
+    """
+    Ajusta o pipeline com n_arvores. Com um pipeline já treinado na mesma base,
+    apenas as árvores que faltam são treinadas: a Random Forest usa warm_start e o
+    XGBoost continua o boosting a partir do booster atual.
+    """
+    classifier = pipe.named_steps['classifier']
+    treinado = hasattr(classifier, 'n_features_in_')
+
+    if isinstance(classifier, RandomForestClassifier):
+        classifier.set_params(n_estimators=n_arvores)
+        with warnings.catch_warnings(): # A base é a mesma do ajuste anterior, então os pesos "balanced" não mudam
+            warnings.filterwarnings('ignore', message='class_weight presets')
+            if treinado:
+                classifier.fit(pipe.named_steps['preprocessor'].transform(X), y)
+            else:
+                pipe.fit(X, y)
+        return pipe
+
+    if not treinado:
+        classifier.set_params(n_estimators=n_arvores)
+        return pipe.fit(X, y)
+
+    atuais = classifier.get_booster().num_boosted_rounds()
+    classifier.set_params(n_estimators=n_arvores - atuais)
+    classifier.fit(pipe.named_steps['preprocessor'].transform(X), y, xgb_model=classifier.get_booster())
+    classifier.set_params(n_estimators=n_arvores)
+    return pipe
+
+
+def medir_latencia(pipe, X, repeticoes=30):
+    """
+    Latência mediana (ms) do predict_proba para um paciente, como no formulário do app.
+    A medição usa uma thread, como o modelo servido (o paralelismo só compensa no treino).
+    """
+    classifier = pipe.named_steps['classifier']
+    n_jobs = classifier.get_params()['n_jobs']
+    classifier.set_params(n_jobs=1)
+
+    linha = X.iloc[:1]
+    pipe.predict_proba(linha)
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        pipe.predict_proba(linha)
+        tempos.append(time.perf_counter() - inicio)
+
+    classifier.set_params(n_jobs=n_jobs)
+    return float(np.median(tempos)) * 1000
+
+
+def avaliar(pipe, X, y):
+    """
+    Métricas de seleção: F-beta (objetivo), recall, F1 e precisão da classe de risco.
+    """
+    y_pred = pipe.predict(X)
+    return {
+        'objetivo': fbeta_score(y, y_pred, beta=BETA),
+        'recall': recall_score(y, y_pred),
+        'f1': f1_score(y, y_pred),
+        'precisao': precision_score(y, y_pred)
+    }
+
+
+def pareto_front(avaliacoes):
+    """
+    Mantém as avaliações não dominadas: nenhuma outra tem objetivo maior ou igual
+    com latência menor ou igual (sendo estritamente melhor em um dos dois).
+    """
+    ordenadas = avaliacoes.sort_values(['latencia_ms', 'objetivo'], ascending=[True, False])
+    melhor_objetivo = -np.inf
+    manter = []
+    for indice, linha in ordenadas.iterrows():
+        if linha['objetivo'] > melhor_objetivo:
+            manter.append(indice)
+            melhor_objetivo = linha['objetivo']
+    return ordenadas.loc[manter]
+
+
+def successive_halving(X, y, candidatos=None, rodadas=RODADAS, fator=FATOR, orcamento=ORCAMENTO_PADRAO):
+    """
+    Busca por successive halving: todos os candidatos começam com poucos dados e poucas
+    árvores; a cada rodada, apenas o melhor 1/fator (pelo F-beta na validação) recebe
+    mais recursos. A busca é interrompida ao estourar o orçamento de tempo (segundos),
+    mantendo o melhor resultado da última rodada concluída. O orçamento é conferido entre
+    os ajustes, então o último ajuste iniciado pode ultrapassá-lo.
+    O vencedor é devolvido sem treino, com a configuração (família, parâmetros e número
+    de árvores) exatamente como foi avaliada: os pipelines dos sobreviventes continuam
+    crescendo nas rodadas seguintes e não servem como referência.
+    """
+    candidatos = candidatos or gerar_candidatos()
+    inicio = time.perf_counter()
+
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X, y, test_size=FRACAO_VALIDACAO, random_state=RANDOM_STATE, stratify=y
+    )
+    # Frações encaixadas: a amostra menor está contida na maior
+    ordem = np.random.default_rng(RANDOM_STATE).permutation(len(X_fit))
+
+    vivos = [(i, familia, params, montar_pipeline(familia, params)) for i, (familia, params) in enumerate(candidatos)]
+    avaliacoes = []
+    interrompida = False
+    fracao_anterior = None
+    rodada_concluida = None
+    vencedor = None # (família, parâmetros, árvores) do melhor da última rodada concluída
+
+    for rodada, (fracao, n_arvores) in enumerate(rodadas):
+        linhas = ordem[:max(int(len(X_fit) * fracao), 1)]
+        X_r, y_r = X_fit.iloc[linhas], y_fit.iloc[linhas]
+        resultados = []
+
+        for i, familia, params, pipe in vivos:
+            if time.perf_counter() - inicio > orcamento:
+                interrompida = True
+                break
+            if fracao != fracao_anterior: # Base maior: as árvores anteriores não valem para ela
+                pipe = montar_pipeline(familia, params)
+            crescer(pipe, n_arvores, X_r, y_r)
+
+            metricas = avaliar(pipe, X_val, y_val)
+            metricas['latencia_ms'] = medir_latencia(pipe, X_val) if fracao == 1.0 else np.nan
+            avaliacoes.append({'candidato': i, 'familia': familia, 'params': params, 'rodada': rodada,
+                               'fracao': fracao, 'arvores': n_arvores, **metricas})
+            resultados.append((metricas['objetivo'], i, familia, params, pipe))
+
+        if interrompida:
+            break
+        rodada_concluida = sorted(resultados, key=lambda r: (-r[0], r[1]))
+        vencedor = (rodada_concluida[0][2], rodada_concluida[0][3], n_arvores)
+        fracao_anterior = fracao
+        n_seguem = max(len(vivos) // fator, 1)
+        vivos = [(i, familia, params, pipe) for _, i, familia, params, pipe in rodada_concluida[:n_seguem]]
+
+    df_avaliacoes = pd.DataFrame(avaliacoes)
+    completas = df_avaliacoes.dropna(subset=['latencia_ms'])
+    melhor = montar_pipeline(*vencedor) if vencedor else None
+
+    return Busca(melhor, df_avaliacoes, pareto_front(completas) if len(completas) else completas,
+                 time.perf_counter() - inicio, interrompida)
+
+
+def main(): # Função principal
+    parser = argparse.ArgumentParser(description="Busca de hiperparâmetros com successive halving e orçamento de tempo.")
+    parser.add_argument('--base', default=DATA_PATH, help="Base tratada (df_base.csv).")
+    parser.add_argument('--candidatos', type=int, default=27, help="Configurações sorteadas na primeira rodada.")
+    parser.add_argument('--orcamento', type=float, default=ORCAMENTO_PADRAO,
+                        help="Tempo máximo da busca, em segundos (conferido entre ajustes: o último pode ultrapassá-lo).")
+    parser.add_argument('--salvar', metavar='JOBLIB', help="Grava o pipeline vencedor (treinado na base de treino completa).")
+    args = parser.parse_args()
+
+    X, y = load_base(args.base)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=y)
+    busca = successive_halving(X_train, y_train, gerar_candidatos(args.candidatos), orcamento=args.orcamento)
+
+    colunas = ['familia', 'params', 'arvores', 'objetivo', 'recall', 'f1', 'latencia_ms']
+    pd.set_option('display.max_colwidth', None)
+    print(f"\nFRONTEIRA DE PARETO (F{BETA} x latência):")
+    print(busca.pareto[colunas].round(4).to_string(index=False))
+    print("-" * 30)
+    print(f"⏱️ Tempo da busca: {busca.duracao:.1f}s{' (interrompida pelo orçamento)' if busca.interrompida else ''}")
+    print(f"🧮 Ajustes: {len(busca.avaliacoes)}")
+
+    if busca.melhor is None:
+        print("⚠️ Nenhuma rodada concluída dentro do orçamento.")
+    else:
+        # O vencedor é retreinado do zero na base de treino completa e avaliado no teste do notebook
+        final = clone(busca.melhor)
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore', message='class_weight presets')
+            final.fit(X_train, y_train)
+        print(f"🏆 Vencedor: {final.named_steps['classifier']}")
+        print(f"📊 Teste: {({k: round(v, 4) for k, v in avaliar(final, X_test, y_test).items()})}")
+        if args.salvar:
+            joblib.dump(final, args.salvar)
+            print(f"📄 Arquivo: {args.salvar}")
+    print("-" * 30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+
+try:
+    import fcntl
+except ImportError: # Windows: sem trava entre processos (os workers do inference_service exigem Linux)
+    fcntl = None
+
+# ==========================================================================
+# Constantes
+# ==========================================================================
+STORE_PATH = 'models/store'
+BLOCO_LEITURA = 1024 * 1024 # Leitura em blocos de 1 MB para calcular o hash
+
+# ==========================================================================
+# Funções
+# ==========================================================================
+
+def sha256_file(caminho):
+    """
+    Calcula o hash SHA-256 de um arquivo sem carregá-lo inteiro na memória.
+    """
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(BLOCO_LEITURA), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _escrita_atomica(destino, escrever):
+    """
+    Escreve em um arquivo temporário na mesma pasta e o renomeia ao final,
+    para que nenhum processo leia um arquivo pela metade.
+    """
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporario = tempfile.mkstemp(dir=destino.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            escrever(f)
+        os.chmod(temporario, 0o644) # Leitura liberada para os demais processos (workers)
+        os.replace(temporario, destino)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+
+
+@contextmanager
+def _trava(caminho):
+    """
+    Trava exclusiva entre processos sobre um arquivo auxiliar, liberada ao sair do bloco.
+    """
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    with open(caminho, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+# ==========================================================================
+# Classes
+# ==========================================================================
+
+class ModelStore:
+    """
+    Repositório local e versionado de artefatos do modelo. Cada artefato é
+    identificado pelo hash do seu conteúdo, conferido antes de cada carga,
+    e carregado com mmap para que os arrays não sejam copiados para o heap.
+    """
+    def __init__(self, raiz=STORE_PATH):
+        self.raiz = Path(raiz)
+        self.objetos = self.raiz / 'objects'
+        self.arquivo_atual = self.raiz / 'CURRENT'
+        self.arquivo_manifesto = self.raiz / 'manifest.json'
+        self.arquivo_trava = self.raiz / 'manifest.lock'
+
+    def object_path(self, sha, sufixo='.joblib'):
+        """
+        Caminho do artefato (ou de um derivado dele, pelo sufixo) dentro do repositório.
+        """
+        return self.objetos / f"{sha}{sufixo}"
+
+    def manifest(self):
+        try:
+            return json.loads(self.arquivo_manifesto.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return {}
+
+    def _registrar(self, sha, **info):
+        # Leitura e regravação sob trava: vários processos (workers) podem importar ao mesmo tempo
+        with _trava(self.arquivo_trava):
+            manifesto = self.manifest()
+            registro = manifesto.setdefault(sha, {'importado_em': datetime.now(timezone.utc).isoformat()})
+            registro.update(bytes=self.object_path(sha).stat().st_size, **info)
+            conteudo = json.dumps(manifesto, indent=2, ensure_ascii=False).encode('utf-8')
+            _escrita_atomica(self.arquivo_manifesto, lambda f: f.write(conteudo))
+
+    def put_bytes(self, conteudo, **info):
+        """
+        Armazena o artefato a partir dos bytes (ex: download) e retorna o hash.
+        """
+        sha = hashlib.sha256(conteudo).hexdigest()
+        if not self.object_path(sha).exists():
+            _escrita_atomica(self.object_path(sha), lambda f: f.write(conteudo))
+        self._registrar(sha, **info)
+        return sha
+
+    def put_file(self, caminho, **info):
+        """
+        Copia um arquivo .joblib para o repositório e retorna o hash.
+        """
+        sha = sha256_file(caminho)
+        if not self.object_path(sha).exists():
+            with open(caminho, 'rb') as origem:
+                _escrita_atomica(self.object_path(sha), lambda f: shutil.copyfileobj(origem, f))
+        self._registrar(sha, origem=str(caminho), **info)
+        return sha
+
+    def find(self, **filtros):
+        """
+        Retorna o hash da versão mais recente cujo registro no manifesto atende aos filtros.
+        """
+        encontrados = [
+            (registro.get('importado_em', ''), sha) for sha, registro in self.manifest().items()
+            if all(registro.get(chave) == valor for chave, valor in filtros.items())
+        ]
+        return max(encontrados)[1] if encontrados else None
+
+    def current(self):
+        try:
+            return self.arquivo_atual.read_text(encoding='utf-8').strip() or None
+        except FileNotFoundError:
+            return None
+
+    def set_current(self, sha):
+        if not self.object_path(sha).exists():
+            raise FileNotFoundError(f"Versão {sha} não encontrada em {self.objetos}")
+        _escrita_atomica(self.arquivo_atual, lambda f: f.write(sha.encode('utf-8')))
+
+    def verify(self, sha):
+        """
+        Confere se o conteúdo armazenado ainda corresponde ao hash da versão.
+        """
+        return sha256_file(self.object_path(sha)) == sha
+
+    def load(self, sha=None, mmap_mode='r'):
+        """
+        Carrega a versão informada (ou a ativa) após conferir o checksum.
+        """
+        sha = sha or self.current()
+        if sha is None:
+            raise FileNotFoundError(f"Nenhuma versão ativa em {self.raiz}")
+        if not self.verify(sha):
+            raise ValueError(f"Checksum inválido para a versão {sha}: artefato corrompido")
+        return joblib.load(self.object_path(sha), mmap_mode=mmap_mode)
+
+
+def main(): # Função principal
+    parser = argparse.ArgumentParser(description="Repositório local de versões do modelo.")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    importar = comandos.add_parser('importar', help="Importa um .joblib e o torna a versão ativa.")
+    importar.add_argument('arquivo')
+    ativar = comandos.add_parser('ativar', help="Define a versão ativa pelo hash.")
+    ativar.add_argument('sha')
+    comandos.add_parser('listar', help="Lista as versões armazenadas.")
+    comandos.add_parser('verificar', help="Confere o checksum de todas as versões.")
+    args = parser.parse_args()
+
+    store = ModelStore()
+    if args.comando == 'importar':
+        sha = store.put_file(args.arquivo)
+        store.set_current(sha)
+        print(f"✅ Versão ativa: {sha}")
+    elif args.comando == 'ativar':
+        store.set_current(args.sha)
+        print(f"✅ Versão ativa: {args.sha}")
+    elif args.comando == 'listar':
+        atual = store.current()
+        for sha, registro in store.manifest().items():
+            print(f"{'*' if sha == atual else ' '} {sha}  {registro}")
+    elif args.comando == 'verificar':
+        for sha in store.manifest():
+            print(f"{'✅' if store.verify(sha) else '❌'} {sha}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import os
+import time
+from collections import namedtuple
+from contextlib import nullcontext
+from pathlib import Path
+
+import joblib
+import pandas as pd
+import requests
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from model_store import ModelStore
+
+# ==========================================================================
+# Constantes
+# ==========================================================================
+MODEL_PATH = 'models/modelo_final_random_forest.joblib'
+MODEL_URL = "https://raw.githubusercontent.com/geoferreira1/fiap_tech_challenge_fase_4/main/models/modelo_final_random_forest.joblib"
+LIMIAR_PADRAO = 0.5 # Limiar de decisão equivalente ao model.predict (classe mais provável)
+INTERVALO_VERSAO = 60 # Segundos entre as conferências da versão do artefato nas páginas do Streamlit
+
+# Esquema das 15 colunas que o formulário clínico entrega ao modelo (mesma ordem do get_clinic_input)
+FEATURES = [
+    'idade',
+    'genero',
+    'consumo_refeicoes_principais',
+    'consumo_vegetais',
+    'consumo_agua',
+    'frequencia_atividade_fisica',
+    'tempo_uso_tecnologia',
+    'fuma',
+    'consumo_alimentos_altamente_caloricos',
+    'monitoramento_calorias',
+    'historico_familiar',
+    'consumo_lanches_entre_refeicoes',
+    'consumo_alcool',
+    'meio_de_transporte',
+    'imc'
+]
+
+# Colunas efetivamente usadas pelo modelo (o IMC é descartado no treino, ver notebook)
+FEATURES_NUM = ['idade', 'fuma', 'consumo_alimentos_altamente_caloricos', 'monitoramento_calorias',
+                'historico_familiar']
+FEATURES_CAT = ['genero', 'consumo_refeicoes_principais', 'consumo_vegetais',
+                'consumo_agua', 'frequencia_atividade_fisica', 'tempo_uso_tecnologia',
+                'consumo_alcool', 'meio_de_transporte', 'consumo_lanches_entre_refeicoes']
+TARGET = 'tendencia_obesidade'
+
+# Resultado da predição: arrays com uma posição por paciente e o limiar aplicado
+RiskPrediction = namedtuple('RiskPrediction', ['classe', 'probabilidade', 'limiar'])
+
+_ultima_falha_download = None # time.monotonic() da última falha do download do artefato
+
+# ==========================================================================
+# Funções
+# ==========================================================================
+
+def build_preprocessor():
+    """
+    Cria o pré-processamento do notebook (padronização das numéricas e one-hot das categóricas).
+    """
+    return ColumnTransformer(
+        transformers=[
+            ('num', StandardScaler(), FEATURES_NUM),
+            ('cat', OneHotEncoder(handle_unknown='ignore'), FEATURES_CAT)
+        ])
+
+
+def artifact_version(store=None):
+    """
+    Retorna o hash da versão ativa do modelo no repositório local (models/store).
+    O artefato exportado pelo notebook é importado sempre que for novo ou alterado;
+    o GitHub só é consultado quando não existe nenhuma versão local.
+    """
+    store = store or ModelStore()
+
+    # 1. Artefato local (models/modelo_final_random_forest.joblib)
+    try:
+        info = os.stat(MODEL_PATH)
+        assinatura = f"{info.st_size}:{info.st_mtime_ns}"
+        if store.find(origem=MODEL_PATH, assinatura=assinatura) is None:
+            store.set_current(store.put_file(MODEL_PATH, assinatura=assinatura))
+    except OSError:
+        pass
+
+    sha = store.current()
+    if sha is not None:
+        return sha
+
+    # 2. Tentativa Remota (GitHub). Após uma falha, nova tentativa só depois de INTERVALO_VERSAO
+    # segundos, para que uma rede indisponível não bloqueie cada nova execução da página
+    global _ultima_falha_download
+    if _ultima_falha_download is not None and time.monotonic() - _ultima_falha_download < INTERVALO_VERSAO:
+        return None
+    try:
+        response = requests.get(MODEL_URL, timeout=15)
+        response.raise_for_status() # Levanta erro se o status não for 200
+
+        sha = store.put_bytes(response.content, origem=MODEL_URL)
+        store.set_current(sha)
+        _ultima_falha_download = None
+        return sha
+    except Exception as e:
+        _ultima_falha_download = time.monotonic()
+        print(f"Erro crítico: Não foi possível carregar o modelo remotamente: {e}")
+
+    return None
+
+
+def load_model(versao=None, store=None):
+    """
+    Carrega o modelo treinado (.joblib) a partir do repositório local de versões,
+    conferindo o checksum e usando mmap. Não depende do Streamlit, podendo ser
+    reutilizada por scripts em lote.
+    """
+    store = store or ModelStore()
+    versao = versao or artifact_version(store)
+    if versao is None:
+        return None
+
+    try:
+        return store.load(versao)
+    except Exception as e:
+        print(f"Erro crítico: Não foi possível carregar a versão {versao} do modelo: {e}")
+        return None
+
+
+def load_cli_model(caminho=MODEL_PATH):
+    """
+    Modelo dos scripts de linha de comando: o .joblib informado, se existir, ou a versão
+    ativa do repositório local. Encerra com uma mensagem clara quando nenhum está disponível
+    (os caminhos padrão são relativos à raiz do repositório).
+    """
+    model = joblib.load(caminho) if Path(caminho).exists() else load_model()
+    if model is None:
+        raise SystemExit(f"❌ Modelo indisponível: {caminho} não encontrado e nenhuma versão local ou remota carregada. "
+                         "Execute a partir da raiz do repositório ou informe --modelo.")
+    return model
+
+
+def validate_features(df):
+    """
+    Confere se o DataFrame possui todas as colunas esperadas pelo modelo.
+    """
+    faltantes = [col for col in FEATURES if col not in df.columns]
+    if faltantes:
+        raise ValueError(f"Colunas obrigatórias ausentes no arquivo: {', '.join(faltantes)}")
+
+
+def predict_risk(model, input_df, threshold=LIMIAR_PADRAO, tracker=None, engine=None, encoder=None):
+    """
+    Calcula classe e probabilidade de risco com um único pré-processamento
+    e uma única passagem pela floresta. Funciona para uma linha ou um lote.
+    A classe é 1 quando a probabilidade de risco supera o limiar.
+    Se a floresta compilada (engine) for informada, ela é usada nos lotes pequenos.
+    Com o encoder rápido (FastEncoder), um paciente pode ser informado como dict,
+    sem a montagem de um DataFrame.
+    """
+    preprocessor = model.named_steps['preprocessor']
+    classifier = model.named_steps['classifier']
+
+    with tracker.stage('preprocessamento') if tracker else nullcontext():
+        if encoder is not None:
+            X = encoder.transform_one(input_df) if isinstance(input_df, dict) else encoder.transform(input_df)
+        else:
+            X = preprocessor.transform(pd.DataFrame([input_df]) if isinstance(input_df, dict) else input_df)
+    with tracker.stage('predict_proba') if tracker else nullcontext():
+        if engine is not None and X.shape[0] <= engine.max_rows:
+            probabilidades = engine.predict_proba(X)[:, 1]
+        else:
+            probabilidades = classifier.predict_proba(X)[:, 1]
+
+    classes = (probabilidades > threshold).astype(int)
+    return RiskPrediction(classes, probabilidades, threshold)
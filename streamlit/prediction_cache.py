@@ -0,0 +1,95 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import threading
+import time
+from collections import OrderedDict
+from numbers import Number
+
+from model_utils import FEATURES
+
+# ==========================================================================
+# Constantes
+# ==========================================================================
+TAMANHO_MAXIMO_PADRAO = 10_000 # Quantidade máxima de perfis guardados
+TTL_PADRAO = 24 * 60 * 60 # Validade de cada predição em segundos
+
+# ==========================================================================
+# Classes
+# ==========================================================================
+
+class PredictionCache:
+    """
+    Cache LRU com expiração (TTL) para as predições, indexado pela versão do
+    modelo e pelo vetor normalizado das 15 features do paciente. É esvaziado
+    automaticamente quando a versão do artefato do modelo muda.
+    """
+    def __init__(self, maxsize=TAMANHO_MAXIMO_PADRAO, ttl=TTL_PADRAO):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.versao = None
+        self.hits = 0
+        self.misses = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock() # O mesmo cache é compartilhado entre sessões
+
+    @staticmethod
+    def make_key(paciente, versao=None):
+        """
+        Gera a chave a partir da versão do modelo e das features (dict ou linha do DataFrame),
+        normalizando números inteiros/decimais e tipos do NumPy para tipos nativos do Python.
+        Com a versão na chave, uma predição calculada com o modelo anterior nunca é
+        devolvida para a versão nova.
+        """
+        chave = [versao]
+        for col in FEATURES:
+            valor = paciente[col]
+            if isinstance(valor, Number):
+                valor = float(valor)
+                valor = int(valor) if valor.is_integer() else round(valor, 6)
+            else:
+                valor = str(valor)
+            chave.append(valor)
+        return tuple(chave)
+
+    def ensure_version(self, versao):
+        """
+        Descarta todas as predições se o artefato do modelo tiver mudado.
+        """
+        with self._lock:
+            if versao != self.versao:
+                self._itens.clear()
+                self.versao = versao
+
+    def get(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None or time.monotonic() - item[0] > self.ttl:
+                if item is not None:
+                    del self._itens[chave] # Predição expirada
+                self.misses += 1
+                return None
+
+            self._itens.move_to_end(chave)
+            self.hits += 1
+            return item[1]
+
+    def put(self, chave, valor):
+        with self._lock:
+            if chave[0] != self.versao: # Calculada antes da troca de versão do modelo: descartada
+                return
+            self._itens[chave] = (time.monotonic(), valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.maxsize:
+                self._itens.popitem(last=False) # Remove o perfil usado há mais tempo
+
+    def stats(self):
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'taxa_acerto': round(self.hits / consultas, 3) if consultas else 0.0,
+                'tamanho': len(self._itens),
+                'versao_modelo': self.versao
+            }
@@ -0,0 +1,150 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from dashboard_data import COLS_PARA_TRADUZIR, TRADUCAO_GERAL, dataset_version, load_snapshot
+from fast_encoder import FastEncoder
+from model_store import ModelStore
+from model_utils import FEATURES, LIMIAR_PADRAO, artifact_version, load_model, predict_risk
+
+# ==========================================================================
+# Constantes
+# ==========================================================================
+TAMANHO_LOTE = 50_000 # Pacientes pontuados por chamada ao modelo (limita a memória da codificação)
+COLS_RISCO = ['risk_proba', 'risk_class']
+COL_HASH = 'hash_linha' # Hash das features de cada linha, gravado junto às pontuações
+TRADUCAO_INVERSA = {texto: valor for valor, texto in TRADUCAO_GERAL.items()}
+FAIXAS_RISCO = {
+    'bins': np.linspace(0, 1, 11),
+    'labels': [f"{i * 10}-{(i + 1) * 10}%" for i in range(10)],
+    'include_lowest': True
+}
+
+# ==========================================================================
+# Funções
+# ==========================================================================
+
+def features_modelo(df):
+    """
+    Recupera, a partir da base traduzida do dashboard, as 15 colunas com os valores
+    originais esperados pelo modelo (desfaz a tradução dos textos).
+    """
+    entrada = df[FEATURES].copy()
+    for col in COLS_PARA_TRADUZIR:
+        texto = entrada[col].astype(object)
+        entrada[col] = texto.map(TRADUCAO_INVERSA).fillna(texto)
+    return entrada
+
+
+def row_hashes(df):
+    """
+    Hash de cada linha nas features do modelo, usado para conferir se as pontuações
+    gravadas correspondem às mesmas linhas (na mesma ordem) da base atual.
+    """
+    return pd.util.hash_pandas_object(features_modelo(df), index=False).to_numpy()
+
+
+def score_base(df, model, threshold=LIMIAR_PADRAO, tamanho_lote=TAMANHO_LOTE, encoder=None):
+    """
+    Pontua toda a base em lotes vetorizados (uma chamada ao modelo por lote).
+    Retorna um DataFrame com risk_proba e risk_class alinhado ao índice de df.
+    """
+    entrada = features_modelo(df)
+    probabilidades = np.empty(len(entrada), dtype=np.float64)
+    for inicio in range(0, len(entrada), tamanho_lote):
+        lote = entrada.iloc[inicio:inicio + tamanho_lote]
+        probabilidades[inicio:inicio + len(lote)] = predict_risk(model, lote, threshold, encoder=encoder).probabilidade
+
+    return pd.DataFrame({
+        'risk_proba': probabilidades,
+        'risk_class': (probabilidades > threshold).astype('int8')
+    }, index=df.index)
+
+
+def load_scores(df, versao_dados, versao_modelo, model=None, store=None):
+    """
+    Pontuações da base para o par (versão da base, versão do modelo). Ficam gravadas
+    no repositório local ao lado do artefato do modelo e só são recalculadas quando
+    uma das versões muda. Como as linhas são casadas pela posição, o hash de cada
+    linha é gravado junto e conferido antes de reaproveitar as pontuações.
+    Sem versão da base (dados remotos), apenas calcula.
+    """
+    store = store or ModelStore()
+    caminho = store.object_path(versao_modelo, f'.scores-{versao_dados}.parquet') if versao_dados else None
+    hashes = row_hashes(df)
+    if caminho is not None and caminho.exists():
+        scores = pd.read_parquet(caminho)
+        if COL_HASH in scores and np.array_equal(scores[COL_HASH].to_numpy(), hashes):
+            return scores[COLS_RISCO].set_axis(df.index)
+
+    model = model if model is not None else load_model(versao_modelo, store)
+    try:
+        encoder = FastEncoder.from_pipeline(model)
+    except Exception:
+        encoder = None
+    scores = score_base(df, model, encoder=encoder)
+
+    if caminho is not None:
+        temporario = caminho.with_name(f".tmp-{os.getpid()}-{caminho.name}")
+        scores.assign(**{COL_HASH: hashes}).reset_index(drop=True).to_parquet(temporario)
+        os.replace(temporario, caminho)
+    return scores
+
+
+def add_risk_columns(df, scores):
+    """
+    Acrescenta à base as colunas de risco previsto e a faixa de probabilidade usada nos gráficos.
+    """
+    df = df.assign(risk_proba=scores['risk_proba'], risk_class=scores['risk_class'])
+    df['faixa_risco'] = pd.cut(df['risk_proba'], **FAIXAS_RISCO)
+    return df
+
+
+def check_scores(model, df, scores, amostra=200, semente=0):
+    """
+    Confere as pontuações contra o predict_proba do pipeline: na base toda em uma
+    chamada e em uma amostra de pacientes pontuados um a um.
+    """
+    entrada = features_modelo(df)
+    esperado = model.predict_proba(entrada)[:, 1]
+    posicoes = np.random.default_rng(semente).choice(len(df), size=min(amostra, len(df)), replace=False)
+    individual = np.array([model.predict_proba(entrada.iloc[[i]])[0, 1] for i in posicoes])
+    return {
+        'linhas': len(df),
+        'diferenca_maxima': float(np.abs(scores['risk_proba'].to_numpy() - esperado).max()),
+        'diferenca_maxima_individual': float(np.abs(scores['risk_proba'].to_numpy()[posicoes] - individual).max())
+    }
+
+
+def main(): # Função principal
+    parser = argparse.ArgumentParser(description="Pré-calcula o risco previsto pelo modelo para toda a base do Dashboard.")
+    parser.add_argument('--verificar', action='store_true', help="Compara as pontuações com o predict_proba do pipeline.")
+    args = parser.parse_args()
+
+    store = ModelStore()
+    versao_dados, versao_modelo = dataset_version(), artifact_version(store)
+    model = load_model(versao_modelo, store)
+    if model is None:
+        raise SystemExit("❌ Modelo indisponível: nenhuma versão local ou remota encontrada. Execute a partir da raiz do repositório.")
+    df = load_snapshot()
+
+    inicio = time.perf_counter()
+    scores = load_scores(df, versao_dados, versao_modelo, model, store)
+    duracao = time.perf_counter() - inicio
+
+    print("-" * 30)
+    print(f"✅ {len(scores)} pacientes pontuados em {duracao:.2f}s (base {versao_dados} | modelo {versao_modelo[:12]})")
+    print(f"📊 Risco médio previsto: {scores['risk_proba'].mean() * 100:.1f}% | classificados em risco: {scores['risk_class'].mean() * 100:.1f}%")
+    if args.verificar:
+        print(f"🔎 Verificação: {check_scores(model, df, scores)}")
+    print("-" * 30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import argparse
+import hashlib
+import os
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree
+
+from dashboard_data import MAPA_OBESIDADE
+from etl import DATA_PATH, load_manifest, read_partitions
+from fast_encoder import FastEncoder
+from latency import LatencyTracker
+from model_store import ModelStore
+from model_utils import FEATURES, artifact_version, load_model
+
+# ==========================================================================
+# Constantes
+# ==========================================================================
+K_PADRAO = 5
+TAMANHO_FOLHA = 40
+COLS_HISTORICO = ['idade', 'genero', 'imc', 'nivel_de_obesidade'] # Exibidas para cada paciente semelhante
+# Fração (e mínimo) de linhas novas fora da árvore antes de reconstruí-la com toda a base
+LIMITE_NOVOS = 0.1
+MINIMO_NOVOS = 1_000
+ESTADO = ['leaf_size', 'arvore', 'novos', 'historico', 'n_linhas', 'impressao'] # Atributos gravados no repositório
+# Níveis observados na base (o df_base usa 'abaixo_do_peso', ausente no mapa do dashboard)
+ROTULOS_NIVEL = {**MAPA_OBESIDADE, 'abaixo_do_peso': 'Abaixo do Peso'}
+
+# ==========================================================================
+# Classes
+# ==========================================================================
+
+class SimilarityIndex:
+    """
+    Índice de vizinhos mais próximos sobre o espaço codificado do modelo (mesma
+    codificação do ColumnTransformer, via FastEncoder): uma KDTree com a base já
+    indexada e um pequeno bloco de linhas novas consultado por força bruta.
+    Linhas acrescentadas à base entram no bloco sem reconstruir a árvore; quando
+    o bloco cresce demais, a árvore é refeita com todas as linhas.
+    """
+    def __init__(self, encoder, leaf_size=TAMANHO_FOLHA):
+        self.encoder = encoder
+        self.leaf_size = leaf_size
+        self.arvore = None
+        self.novos = np.empty((0, encoder.n_saida))
+        self.historico = {} # Colunas exibidas ({coluna: array}), na ordem das linhas indexadas
+        self.n_linhas = 0
+        self.impressao = None # Impressão digital das linhas indexadas (detecta base reescrita)
+
+    @classmethod
+    def build(cls, encoder, df, leaf_size=TAMANHO_FOLHA):
+        indice = cls(encoder, leaf_size)
+        indice.update(df)
+        return indice
+
+    @property
+    def n_arvore(self):
+        return 0 if self.arvore is None else self.arvore.data.shape[0]
+
+    def update(self, df):
+        """
+        Sincroniza o índice com a base processada. Se as linhas já indexadas continuam
+        no início da base, apenas as novas são codificadas; caso contrário, tudo é refeito.
+        Retorna a quantidade de linhas codificadas nesta chamada.
+        """
+        hashes = row_hashes(df)
+        if len(df) < self.n_linhas or _impressao(hashes[:self.n_linhas]) != self.impressao:
+            self.arvore, self.novos = None, np.empty((0, self.encoder.n_saida))
+            self.historico = {}
+            self.n_linhas = 0
+
+        novas = df.iloc[self.n_linhas:]
+        if len(novas):
+            X = self.encoder.transform(novas[FEATURES])
+            self.historico = {
+                col: np.concatenate([self.historico[col], novas[col].to_numpy()]) if self.historico else novas[col].to_numpy()
+                for col in COLS_HISTORICO
+            }
+            if self.arvore is None:
+                self.arvore = KDTree(X, leaf_size=self.leaf_size)
+            else:
+                self.novos = np.vstack([self.novos, X])
+                if len(self.novos) > max(MINIMO_NOVOS, LIMITE_NOVOS * self.n_arvore):
+                    self._reconstruir()
+
+        self.n_linhas = len(df)
+        self.impressao = _impressao(hashes)
+        return len(novas)
+
+    def _reconstruir(self):
+        """
+        Refaz a árvore com as linhas já indexadas e o bloco de linhas novas.
+        """
+        X = np.vstack([np.asarray(self.arvore.data), self.novos])
+        self.arvore = KDTree(X, leaf_size=self.leaf_size)
+        self.novos = np.empty((0, self.encoder.n_saida))
+
+    def query_matrix(self, Q, k=K_PADRAO):
+        """
+        Distâncias e posições (no histórico) dos k vizinhos de cada linha já codificada,
+        combinando a árvore e o bloco de linhas novas (vazias se a base indexada estiver vazia).
+        """
+        k = min(k, self.n_linhas)
+        if k == 0:
+            return np.empty((len(Q), 0)), np.empty((len(Q), 0), dtype=np.intp)
+        distancias, posicoes = self.arvore.query(Q, k=min(k, self.n_arvore))
+        if len(self.novos):
+            d_novos = np.sqrt(np.maximum(((Q[:, None, :] - self.novos[None, :, :]) ** 2).sum(axis=2), 0))
+            distancias = np.hstack([distancias, d_novos])
+            posicoes = np.hstack([posicoes, np.broadcast_to(self.n_arvore + np.arange(len(self.novos)), d_novos.shape)])
+            ordem = np.argsort(distancias, axis=1, kind='stable')[:, :k]
+            distancias = np.take_along_axis(distancias, ordem, axis=1)
+            posicoes = np.take_along_axis(posicoes, ordem, axis=1)
+        return distancias, posicoes
+
+    def query(self, paciente, k=K_PADRAO):
+        """
+        Os k pacientes da base mais próximos do paciente (dict), com a distância
+        no espaço codificado e o nível de obesidade observado.
+        """
+        if self.n_linhas == 0:
+            return pd.DataFrame(columns=COLS_HISTORICO + ['distancia'])
+        distancias, posicoes = self.query_matrix(self.encoder.transform_one(paciente), k)
+        return pd.DataFrame({
+            **{col: valores[posicoes[0]] for col, valores in self.historico.items()},
+            'distancia': distancias[0]
+        })
+
+    def save(self, caminho):
+        """
+        Grava o estado do índice (árvore, linhas novas e histórico). O encoder não é
+        gravado: ele é refeito a partir do modelo da mesma versão ao carregar.
+        """
+        estado = {atributo: getattr(self, atributo) for atributo in ESTADO}
+        joblib.dump(estado, caminho)
+
+    @classmethod
+    def load(cls, caminho, encoder):
+        indice = cls(encoder)
+        for atributo, valor in joblib.load(caminho).items():
+            setattr(indice, atributo, valor)
+        return indice
+
+# ==========================================================================
+# Funções
+# ==========================================================================
+
+def row_hashes(df):
+    """
+    Hash de cada linha (features e nível observado), usado para conferir se a base só cresceu.
+    """
+    return pd.util.hash_pandas_object(df[FEATURES + ['nivel_de_obesidade']], index=False).to_numpy()
+
+
+def _impressao(hashes):
+    return hashlib.sha256(hashes.tobytes()).hexdigest()
+
+
+def read_source(origem=DATA_PATH):
+    """
+    Lê a base processada: o df_base.csv ou a saída particionada do ETL.
+    """
+    if Path(origem).is_dir():
+        return read_partitions(origem)
+    return pd.read_csv(origem, encoding='utf-8-sig')
+
+
+def source_signature(origem=DATA_PATH):
+    """
+    Assinatura barata da base (versão do ETL particionado ou tamanho e data do arquivo),
+    usada na chave do cache do Streamlit.
+    """
+    if Path(origem).is_dir():
+        return load_manifest(origem)['versao']
+    info = os.stat(origem)
+    return f"{info.st_size}:{info.st_mtime_ns}"
+
+
+def load_index(model, versao, origem=DATA_PATH, store=None):
+    """
+    Carrega o índice da versão do modelo (gravado no repositório local ao lado do
+    artefato), acrescenta as linhas novas da base e grava de volta se algo mudou.
+    Na primeira vez, constrói o índice com toda a base.
+    """
+    store = store or ModelStore()
+    caminho = store.object_path(versao, '.neighbors.joblib')
+    df = read_source(origem)
+
+    encoder = FastEncoder.from_pipeline(model)
+
+    if caminho.exists():
+        indice = SimilarityIndex.load(caminho, encoder)
+        alteradas = indice.update(df)
+    else:
+        indice = SimilarityIndex.build(encoder, df)
+        alteradas = len(df)
+
+    if alteradas:
+        temporario = caminho.with_name(f".tmp-{os.getpid()}-{caminho.name}")
+        indice.save(temporario)
+        os.replace(temporario, caminho)
+    return indice
+
+
+def check_neighbors(indice, df, k=K_PADRAO, amostra=300, semente=0):
+    """
+    Compara as distâncias dos k vizinhos do índice com a busca exaustiva na base toda
+    (as distâncias são comparadas porque há pacientes repetidos, com empates).
+    """
+    X = indice.encoder.transform(df[FEATURES])
+    posicoes = np.random.default_rng(semente).choice(len(df), size=min(amostra, len(df)), replace=False)
+    distancias, _ = indice.query_matrix(X[posicoes], k)
+
+    exaustiva = np.sqrt(((X[posicoes][:, None, :] - X[None, :, :]) ** 2).sum(axis=2))
+    esperado = np.sort(exaustiva, axis=1)[:, :k]
+    return {'consultas': len(posicoes), 'diferenca_maxima': float(np.abs(distancias - esperado).max())}
+
+
+def benchmark(indice, pacientes, k=K_PADRAO, repeticoes=2000):
+    """
+    Latência (ms) de uma consulta completa (codificação + busca), um paciente por vez.
+    """
+    tracker = LatencyTracker(janela=repeticoes)
+    for i in range(repeticoes):
+        with tracker.stage('consulta'):
+            indice.query(pacientes[i % len(pacientes)], k)
+    return tracker.summary()['consulta']
+
+
+def main(): # Função principal
+    parser = argparse.ArgumentParser(description="Constrói ou atualiza o índice de pacientes semelhantes da versão ativa do modelo.")
+    parser.add_argument('--origem', default=DATA_PATH, help="df_base.csv ou pasta particionada gerados pelo ETL.")
+    parser.add_argument('--k', type=int, default=K_PADRAO, help="Quantidade de vizinhos por consulta.")
+    parser.add_argument('--verificar', action='store_true', help="Compara com a busca exaustiva e mede a latência.")
+    args = parser.parse_args()
+
+    store = ModelStore()
+    versao = artifact_version(store)
+    model = load_model(versao, store)
+    if model is None:
+        raise SystemExit("❌ Modelo indisponível: nenhuma versão local ou remota encontrada. Execute a partir da raiz do repositório.")
+    indice = load_index(model, versao, args.origem, store)
+
+    print("-" * 30)
+    print(f"✅ Índice com {indice.n_linhas} pacientes ({indice.n_arvore} na árvore, {len(indice.novos)} novos) | modelo {versao[:12]}")
+    print(f"📄 Arquivo: {store.object_path(versao, '.neighbors.joblib')}")
+    if args.verificar:
+        df = read_source(args.origem)
+        print(f"🔎 Verificação: {check_neighbors(indice, df, args.k)}")
+        print(f"⏱️ Latência por consulta (ms): {benchmark(indice, df[FEATURES].to_dict('records'), args.k)}")
+    print("-" * 30)
+
+
+if __name__ == "__main__":
+    main()
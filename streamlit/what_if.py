@@ -0,0 +1,102 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import numpy as np
+import pandas as pd
+
+from model_utils import FEATURES, predict_risk
+
+# ==========================================================================
+# Constantes
+# ==========================================================================
+# Hábitos modificáveis: rótulo exibido e níveis (valor do modelo -> texto do formulário)
+SIM_NAO = {1: 'Sim', 0: 'Não'}
+FREQUENCIA = {'nunca': 'Nunca', 'baixa': 'Às vezes', 'moderada': 'Frequentemente', 'alta': 'Sempre'}
+HABITOS = {
+    'consumo_agua': ('Consumo diário de água', {'baixa': '< 1 Litro', 'moderada': '1-2 Litros', 'alta': '> 2 Litros'}),
+    'frequencia_atividade_fisica': ('Atividade física', {'sedentario': 'Sedentário', 'baixa': 'Baixa', 'moderada': 'Moderada', 'alta': 'Alta'}),
+    'consumo_lanches_entre_refeicoes': ('Come entre as refeições', FREQUENCIA),
+    'consumo_alcool': ('Bebidas alcoólicas', FREQUENCIA),
+    'consumo_vegetais': ('Consumo de vegetais', {'raramente': 'Raramente', 'as_vezes': 'Às vezes', 'sempre': 'Sempre'}),
+    'consumo_refeicoes_principais': ('Refeições principais por dia', {
+        'uma_refeicao_por_dia': '1', 'duas_refeicoes_por_dia': '2',
+        'tres_refeicoes_por_dia': '3', 'maior_que_tres_refeicoes_por_dia': '4+'
+    }),
+    'tempo_uso_tecnologia': ('Tempo em dispositivos eletrônicos', {'baixa': 'Baixa', 'moderada': 'Moderada', 'alta': 'Alta'}),
+    'meio_de_transporte': ('Meio de transporte', {
+        'transporte_publico': 'Transporte Público', 'caminhada': 'Caminhada', 'carro': 'Carro',
+        'bicicleta': 'Bicicleta', 'moto': 'Moto'
+    }),
+    'fuma': ('Fumante', SIM_NAO),
+    'consumo_alimentos_altamente_caloricos': ('Alimentos calóricos com frequência', SIM_NAO),
+    'monitoramento_calorias': ('Contabiliza as calorias', SIM_NAO)
+}
+VARIACOES_PESO = (-10, -5, 5) # Kg acrescentados ao peso atual (alteram apenas o IMC, se o modelo o utilizar)
+
+# ==========================================================================
+# Funções
+# ==========================================================================
+
+def calcular_imc(peso, altura):
+    """
+    IMC arredondado para cima, como no formulário de dados pessoais.
+    """
+    return int(np.ceil(peso / (altura ** 2)))
+
+
+def expand_scenarios(paciente, peso=None, altura=None):
+    """
+    Gera o paciente original (primeira linha) e uma variação por alternativa de cada
+    hábito, mudando um único campo por vez. Com peso e altura, inclui as variações de peso.
+    Retorna a lista de pacientes e a descrição (hábito, atual, alternativa) de cada variação.
+    """
+    cenarios = [dict(paciente)]
+    descricoes = [(None, None, None)]
+
+    for col, (rotulo, niveis) in HABITOS.items():
+        for valor, texto in niveis.items():
+            if valor == paciente[col]:
+                continue
+            cenarios.append({**paciente, col: valor})
+            descricoes.append((rotulo, niveis.get(paciente[col], str(paciente[col])), texto))
+
+    if peso is not None and altura is not None:
+        for delta in VARIACOES_PESO:
+            if peso + delta <= 0:
+                continue
+            cenarios.append({**paciente, 'imc': calcular_imc(peso + delta, altura)})
+            descricoes.append(('Peso', f"{peso:.0f} kg", f"{peso + delta:.0f} kg ({delta:+d} kg)"))
+
+    return cenarios, descricoes
+
+
+def usa_imc(model, encoder=None):
+    """
+    Indica se o IMC é uma variável do modelo (o pipeline atual o descarta no ColumnTransformer).
+    """
+    if encoder is not None:
+        return 'imc' in encoder.source_columns()
+    return any(
+        'imc' in list(colunas) for _, transformador, colunas in model.named_steps['preprocessor'].transformers_
+        if transformador != 'drop'
+    )
+
+
+def what_if(model, paciente, peso=None, altura=None, engine=None, encoder=None):
+    """
+    Pontua todas as variações com uma única chamada ao modelo e retorna a tabela
+    ordenada pela variação do risco (as mudanças que mais reduzem o risco primeiro).
+    As variações de peso só entram quando o IMC é uma variável do modelo; caso
+    contrário, teriam sempre variação zero.
+    """
+    if not usa_imc(model, encoder):
+        peso = altura = None
+    cenarios, descricoes = expand_scenarios(paciente, peso, altura)
+    predicao = predict_risk(model, pd.DataFrame(cenarios, columns=FEATURES), engine=engine, encoder=encoder)
+
+    probabilidades = predicao.probabilidade
+    tabela = pd.DataFrame(descricoes[1:], columns=['Hábito', 'Atual', 'Alternativa'])
+    tabela['Risco (%)'] = probabilidades[1:] * 100
+    tabela['Variação (p.p.)'] = (probabilidades[1:] - probabilidades[0]) * 100
+
+    return tabela.sort_values('Variação (p.p.)', kind='stable').reset_index(drop=True)
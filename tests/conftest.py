@@ -0,0 +1,40 @@
+# ==========================================================================
+# Importe de bibliotecas
+# ==========================================================================
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+
+# Os módulos do app ficam em streamlit/ e se importam pelo nome (como no `streamlit run`)
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAIZ / 'streamlit'))
+
+from model_utils import FEATURES, TARGET, build_preprocessor # noqa: E402
+
+# ==========================================================================
+# Fixtures
+# ==========================================================================
+
+@pytest.fixture(scope='session')
+def df_base():
+    """
+    Base tratada versionada no repositório (data_processed/df_base.csv).
+    """
+    return pd.read_csv(RAIZ / 'data_processed' / 'df_base.csv', encoding='utf-8-sig')
+
+
+@pytest.fixture(scope='session')
+def pipeline(df_base):
+    """
+    Pipeline no formato do notebook (preprocessor + Random Forest), treinado na base
+    para que os testes não dependam do artefato .joblib baixado do GitHub.
+    """
+    model = Pipeline(steps=[
+        ('preprocessor', build_preprocessor()),
+        ('classifier', RandomForestClassifier(n_estimators=30, random_state=123, n_jobs=1))
+    ])
+    return model.fit(df_base[FEATURES], df_base[TARGET])
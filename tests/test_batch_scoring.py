@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_scoring import score_file
+from model_utils import FEATURES
+
+
+@pytest.fixture
+def pacientes(df_base):
+    """
+    300 pacientes com uma coluna extra vazia no primeiro bloco (de 100) e preenchida depois.
+    """
+    df = df_base[FEATURES].head(300).reset_index(drop=True)
+    df['retorno'] = np.where(df.index < 150, None, 'sim')
+    return df
+
+
+@pytest.mark.parametrize('formato_entrada', ['csv', 'parquet'])
+@pytest.mark.parametrize('formato_saida', ['csv', 'parquet'])
+def test_coluna_extra_preenchida_apos_o_primeiro_bloco(pipeline, pacientes, tmp_path, formato_entrada, formato_saida):
+    entrada, saida = tmp_path / f'entrada.{formato_entrada}', tmp_path / f'saida.{formato_saida}'
+    if formato_entrada == 'csv':
+        pacientes.to_csv(entrada, index=False)
+    else:
+        pacientes.to_parquet(entrada, index=False)
+
+    assert score_file(entrada, saida, pipeline, chunksize=100) == len(pacientes)
+
+    resultado = pd.read_csv(saida) if formato_saida == 'csv' else pd.read_parquet(saida)
+    assert resultado['retorno'].isna().sum() == 150
+    assert (resultado['retorno'].iloc[150:] == 'sim').all()
+    np.testing.assert_allclose(resultado['probabilidade_risco'], pipeline.predict_proba(pacientes[FEATURES])[:, 1])
@@ -0,0 +1,104 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl import (
+    RAW_PATH, limpar_numero_float, limpar_numero_int, limpar_serie_float, limpar_serie_int, load_manifest,
+    read_partitions, read_raw, transformar_em_lotes
+)
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+CASOS = [
+    # Vírgulas e pontos como separadores
+    '1,75', '1.75', '1.234,56', '1,234.56', '1.2.3', '12,', '12.', ',5', '.', ',,', '1,,2',
+    # Brancos e ausentes
+    '', ' ', '   ', '\t', ' 42 ', None, np.nan,
+    # Sinais e notação científica
+    '-3', '+3', '-1,5', '1e5', '1E-3', '--7',
+    # Lixo, datas e Unicode
+    'abc', '25 anos', '1/2/2020', '12/05', 'x1y2', '½', '²', '٣', '０', 'ç12',
+    # Números já convertidos e limites da idade
+    12, 21.0, 25.7, 1e16, 1e-05, '120', '121', '0007', '9' * 400, '0' * 10 + '7'
+]
+
+
+def _comparar(vetorizada, por_valor, serie):
+    esperado = serie.apply(por_valor)
+    obtido = vetorizada(serie)
+    assert obtido.dtype == esperado.dtype
+    pd.testing.assert_series_equal(obtido, esperado, check_exact=True)
+
+
+@pytest.mark.parametrize('vetorizada, por_valor', [
+    (limpar_serie_float, limpar_numero_float), (limpar_serie_int, limpar_numero_int)
+])
+class TestLimpezaVetorizada:
+    def test_casos_limite(self, vetorizada, por_valor):
+        _comparar(vetorizada, por_valor, pd.Series(CASOS, dtype=object))
+
+    @pytest.mark.parametrize('valor', CASOS)
+    def test_cada_caso_isolado(self, vetorizada, por_valor, valor):
+        _comparar(vetorizada, por_valor, pd.Series([valor], dtype=object))
+
+    @pytest.mark.parametrize('semente', range(5))
+    def test_textos_aleatorios(self, vetorizada, por_valor, semente):
+        # Textos sorteados com dígitos, separadores, sinais, letras, espaços e Unicode
+        rng = np.random.default_rng(semente)
+        alfabeto = list('0123456789') * 3 + list('.,/ -eE+') + list('abcxyz') + ['\t', '²', '٣', 'ç', '½', '０']
+        textos = [''.join(rng.choice(alfabeto, t)) for t in rng.integers(0, 12, 20_000)]
+        _comparar(vetorizada, por_valor, pd.Series(textos, dtype=object))
+
+    def test_serie_vazia(self, vetorizada, por_valor):
+        # O Series.apply devolve object em uma série vazia; a versão vetorizada mantém float64
+        obtido = vetorizada(pd.Series([], dtype=object))
+        assert obtido.empty and obtido.dtype == np.float64
+
+    def test_sem_ausentes_mantem_tipo(self, vetorizada, por_valor):
+        _comparar(vetorizada, por_valor, pd.Series(['1', '22', '33'], dtype=object))
+
+
+@pytest.mark.parametrize('coluna', ['Age', 'Height', 'Weight'])
+def test_colunas_da_base_original(coluna):
+    serie = read_raw(RAIZ / RAW_PATH)[coluna]
+    _comparar(limpar_serie_float, limpar_numero_float, serie)
+    _comparar(limpar_serie_int, limpar_numero_int, serie)
+
+
+@pytest.fixture
+def origem(tmp_path):
+    """
+    Recorte da base original (cabeçalho e 250 registros) em uma pasta temporária.
+    """
+    linhas = (RAIZ / RAW_PATH).read_bytes().splitlines(keepends=True)
+    caminho = tmp_path / 'Obesity.csv'
+    caminho.write_bytes(b''.join(linhas[:251]))
+    return caminho
+
+
+def test_execucao_incremental_sem_novidades(origem, tmp_path):
+    destino = tmp_path / 'df_base'
+    completo = transformar_em_lotes(origem, destino, tamanho_lote=100)
+    assert completo['alteradas'] == ['part-00000.parquet', 'part-00001.parquet', 'part-00002.parquet']
+
+    sem_novidades = transformar_em_lotes(origem, destino, tamanho_lote=100, incremental=True)
+    manifesto = load_manifest(destino)
+    assert sem_novidades['modo'] == 'incremental'
+    assert sem_novidades['alteradas'] == manifesto['alteradas'] == []
+    assert manifesto['versao'] == completo['versao']
+    assert len(read_partitions(destino)) == completo['linhas_gravadas']
+
+
+def test_reprocessamento_de_base_vazia(origem, tmp_path):
+    destino = tmp_path / 'df_base'
+    transformar_em_lotes(origem, destino, tamanho_lote=100)
+
+    origem.write_bytes(origem.read_bytes().splitlines(keepends=True)[0])
+    vazia = transformar_em_lotes(origem, destino, tamanho_lote=100)
+    manifesto = load_manifest(destino)
+    assert vazia['particoes'] == 0
+    assert manifesto['particoes'] == manifesto['alteradas'] == []
+    assert not list(destino.glob('part-*.parquet'))
+    assert read_partitions(destino).empty
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from explain import Explainer, check_additivity
+from fast_encoder import FastEncoder
+from forest_engine import CompiledForest
+from model_utils import FEATURES, FEATURES_CAT
+
+TOLERANCIA = 1e-9
+
+
+@pytest.fixture(scope='module')
+def explainer(pipeline):
+    return Explainer(CompiledForest.from_pipeline(pipeline), FastEncoder.from_pipeline(pipeline))
+
+
+@pytest.fixture(scope='module')
+def entrada(df_base):
+    return df_base[FEATURES]
+
+
+@pytest.fixture(scope='module')
+def explicacao(explainer, entrada):
+    return explainer.explain_matrix(explainer.encoder.transform(entrada))
+
+
+def test_aditividade_na_base(pipeline, explainer, entrada):
+    assert check_additivity(pipeline, explainer, entrada)['diferenca_maxima'] < TOLERANCIA
+
+
+def test_aditividade_por_paciente(pipeline, explainer, entrada):
+    for i in range(0, len(entrada), 97):
+        base, contribuicoes = explainer.explain(entrada.iloc[i].to_dict())
+        esperado = pipeline.predict_proba(entrada.iloc[[i]])[0, explainer.classe]
+        assert abs(base + contribuicoes.sum() - esperado) < TOLERANCIA
+        assert sorted(contribuicoes.index) == sorted(FEATURES)
+
+
+def test_imc_sem_contribuicao(explicacao):
+    _, contribuicoes = explicacao
+    assert not contribuicoes[:, FEATURES.index('imc')].any()
+
+
+def test_one_hot_somado_por_campo(explainer, entrada, explicacao):
+    _, por_campo = explicacao
+    _, por_coluna = explainer.engine.contributions(explainer.encoder.transform(entrada))
+    por_coluna = por_coluna[:, :, explainer.classe]
+    origem = np.array(explainer.encoder.source_columns())
+
+    # Cada coluna codificada pertence a exatamente um campo
+    np.testing.assert_array_equal(explainer._agregacao.sum(axis=1), 1.0)
+    for campo in FEATURES:
+        esperado = por_coluna[:, origem == campo].sum(axis=1)
+        np.testing.assert_allclose(por_campo[:, FEATURES.index(campo)], esperado, rtol=0, atol=TOLERANCIA)
+    assert all((origem == campo).sum() > 1 for campo in FEATURES_CAT)
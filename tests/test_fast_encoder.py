@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from fast_encoder import FastEncoder
+from model_utils import FEATURES
+
+
+def _bits_iguais(a, b):
+    return a.shape == b.shape and a.dtype == b.dtype and np.array_equal(a.view(np.int64), b.view(np.int64))
+
+
+@pytest.fixture(scope='module')
+def preprocessor(pipeline):
+    return pipeline.named_steps['preprocessor']
+
+
+@pytest.fixture(scope='module')
+def encoder(pipeline):
+    return FastEncoder.from_pipeline(pipeline)
+
+
+@pytest.fixture(scope='module')
+def entrada(df_base):
+    return df_base[FEATURES]
+
+
+@pytest.fixture(scope='module')
+def desconhecidas(entrada):
+    # Categorias inexistentes no treino em todas as colunas do one-hot (metade das linhas)
+    df = entrada.head(60).copy()
+    df['genero'] = df['genero'].astype(object)
+    for col in ['consumo_refeicoes_principais', 'consumo_vegetais', 'consumo_agua', 'frequencia_atividade_fisica',
+                'tempo_uso_tecnologia', 'consumo_alcool', 'meio_de_transporte', 'consumo_lanches_entre_refeicoes']:
+        df.loc[df.index[::2], col] = 'desconhecida'
+    df.loc[df.index[1::4], 'genero'] = 7
+    return df
+
+
+def test_transform_bit_a_bit(preprocessor, encoder, entrada):
+    assert _bits_iguais(encoder.transform(entrada), preprocessor.transform(entrada))
+
+
+def test_transform_one_bit_a_bit(preprocessor, encoder, entrada):
+    por_paciente = np.vstack([encoder.transform_one(p) for p in entrada.to_dict('records')])
+    assert _bits_iguais(por_paciente, preprocessor.transform(entrada))
+
+
+def test_categorias_desconhecidas_ignoradas(preprocessor, encoder, desconhecidas):
+    esperado = preprocessor.transform(desconhecidas)
+    assert _bits_iguais(encoder.transform(desconhecidas), esperado)
+    por_paciente = np.vstack([encoder.transform_one(p) for p in desconhecidas.to_dict('records')])
+    assert _bits_iguais(por_paciente, esperado)
+
+
+def test_paciente_com_tipos_nativos_do_python(preprocessor, encoder, entrada):
+    # O formulário entrega int/float do Python, não tipos do NumPy
+    paciente = {col: (valor.item() if hasattr(valor, 'item') else valor) for col, valor in entrada.iloc[3].items()}
+    assert _bits_iguais(encoder.transform_one(paciente), preprocessor.transform(entrada.iloc[[3]]))
+
+
+def test_colunas_de_origem(encoder, preprocessor):
+    origem = encoder.source_columns()
+    assert len(origem) == encoder.n_saida == len(preprocessor.get_feature_names_out())
+    assert 'imc' not in origem # Descartado pelo ColumnTransformer (remainder='drop')
+
+
+def test_rejeita_categoria_desconhecida_com_handle_unknown_error(pipeline, entrada):
+    preprocessor = pipeline.named_steps['preprocessor']
+    encoder = FastEncoder.from_preprocessor(preprocessor)
+    encoder.categoricas = [(col, d, tabela, False) for col, d, tabela, _ in encoder.categoricas]
+    paciente = {**entrada.iloc[0].to_dict(), 'consumo_agua': 'desconhecida'}
+    with pytest.raises(ValueError):
+        encoder.transform_one(paciente)
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from forest_engine import CompiledForest
+from model_utils import FEATURES, TARGET
+
+
+@pytest.fixture(scope='module')
+def X_base(pipeline, df_base):
+    return pipeline.named_steps['preprocessor'].transform(df_base[FEATURES])
+
+
+@pytest.fixture(scope='module')
+def floresta_com_ausentes(X_base, df_base):
+    """
+    Floresta treinada com valores ausentes (missing_go_to_left aprendido nos splits)
+    e a matriz com cerca de 10% das células em NaN.
+    """
+    rng = np.random.default_rng(0)
+    X = X_base.copy()
+    X[rng.random(X.shape) < 0.1] = np.nan
+    forest = RandomForestClassifier(n_estimators=30, random_state=0, n_jobs=1).fit(X, df_base[TARGET])
+    return forest, X
+
+
+def _folhas_sklearn(forest, compilada, X):
+    """
+    Converte os índices locais do sklearn (por árvore) para os índices globais da floresta compilada.
+    """
+    return forest.apply(X) + compilada.roots[None, :]
+
+
+def test_predict_proba_identico_ao_sklearn(pipeline, X_base):
+    forest = pipeline.named_steps['classifier']
+    compilada = CompiledForest.from_estimator(forest)
+    np.testing.assert_array_equal(compilada.predict_proba(X_base), forest.predict_proba(X_base))
+
+
+def test_apply_identico_ao_sklearn(pipeline, X_base):
+    forest = pipeline.named_steps['classifier']
+    compilada = CompiledForest.from_estimator(forest)
+    X = np.asarray(X_base, dtype=np.float32)
+    np.testing.assert_array_equal(compilada.apply(X), _folhas_sklearn(forest, compilada, X))
+
+
+def test_paridade_com_valores_ausentes(floresta_com_ausentes):
+    forest, X = floresta_com_ausentes
+    compilada = CompiledForest.from_estimator(forest)
+    X32 = np.asarray(X, dtype=np.float32)
+    np.testing.assert_array_equal(compilada.apply(X32), _folhas_sklearn(forest, compilada, X32))
+    np.testing.assert_array_equal(compilada.predict_proba(X), forest.predict_proba(X))
+
+
+def test_ausentes_em_floresta_treinada_sem_nan(pipeline, X_base):
+    # Sem NaN no treino, o sklearn envia os ausentes para o filho com mais amostras
+    forest = pipeline.named_steps['classifier']
+    compilada = CompiledForest.from_estimator(forest)
+    X = X_base.copy()
+    X[::7, :5] = np.nan
+    np.testing.assert_array_equal(compilada.predict_proba(X), forest.predict_proba(X))
+
+
+@pytest.mark.parametrize('n_linhas', [1, 7, 256, 1031])
+def test_tamanhos_de_lote(pipeline, X_base, n_linhas):
+    forest = pipeline.named_steps['classifier']
+    compilada = CompiledForest.from_estimator(forest)
+    np.testing.assert_array_equal(compilada.predict_proba(X_base[:n_linhas]), forest.predict_proba(X_base[:n_linhas]))
+
+
+def test_salvar_e_carregar_com_mmap(pipeline, X_base, tmp_path):
+    forest = pipeline.named_steps['classifier']
+    caminho = CompiledForest.from_estimator(forest).save(tmp_path / 'floresta.joblib')
+    carregada = CompiledForest.load(caminho, mmap_mode='r')
+    np.testing.assert_array_equal(carregada.predict_proba(X_base), forest.predict_proba(X_base))
+
+
+def test_rejeita_estimador_nao_treinado():
+    with pytest.raises(TypeError):
+        CompiledForest.from_estimator(RandomForestClassifier())